@@ -0,0 +1,54 @@
+"""add checkout_request_id and mpesa_receipt to campaign_donations
+
+Revision ID: 0e5e22f54153
+Revises: 98a61ae37fe0
+Create Date: 2026-10-18 15:04:52.660148
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0e5e22f54153'
+down_revision: Union[str, Sequence[str], None] = '98a61ae37fe0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('campaign_donations', sa.Column('checkout_request_id', sa.String(length=100), nullable=True))
+    op.add_column('campaign_donations', sa.Column('mpesa_receipt', sa.String(length=50), nullable=True))
+
+    # Pending pushes still hold the CheckoutRequestID in transaction_id. Completed ones were overwritten with the
+    # receipt, their id survives in callback_data: the STK response, the success callback, or the failure callback
+    # which used to be stored as a JSON string.
+    op.execute("""
+        UPDATE campaign_donations
+        SET checkout_request_id = COALESCE(
+            callback_data::jsonb #>> '{Body,stkCallback,CheckoutRequestID}',
+            callback_data::jsonb ->> 'CheckoutRequestID',
+            CASE WHEN json_typeof(callback_data) = 'string'
+                 THEN (callback_data::jsonb #>> '{}')::jsonb #>> '{Body,stkCallback,CheckoutRequestID}' END,
+            CASE WHEN status = 'PENDING' THEN transaction_id END
+        )
+        WHERE method = 'MPESA'
+    """)
+    op.execute("""
+        UPDATE campaign_donations
+        SET mpesa_receipt = transaction_id
+        WHERE method = 'MPESA' AND status = 'SUCCESS'
+    """)
+
+    op.create_index('ix_campaign_donations_checkout_request_id', 'campaign_donations', ['checkout_request_id'],
+                    unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_campaign_donations_checkout_request_id', table_name='campaign_donations')
+    op.drop_column('campaign_donations', 'mpesa_receipt')
+    op.drop_column('campaign_donations', 'checkout_request_id')
@@ -0,0 +1,48 @@
+"""add donation_daily_stats rollup table
+
+Revision ID: 3bace99d5961
+Revises: ae775b76ea81
+Create Date: 2026-10-18 13:02:47.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3bace99d5961'
+down_revision: Union[str, Sequence[str], None] = 'ae775b76ea81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('donation_daily_stats',
+    sa.Column('campaign_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('tenant_id', sa.UUID(), nullable=False),
+    sa.Column('donation_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('campaign_id', 'day')
+    )
+    op.create_index('ix_donation_daily_stats_tenant_day', 'donation_daily_stats', ['tenant_id', 'day'], unique=False)
+
+    # Backfill from the live table, same buckets as app.features.stats.rollups.rebuild_rollups
+    op.execute("""
+        INSERT INTO donation_daily_stats (campaign_id, day, tenant_id, donation_count, total_amount)
+        SELECT campaign_id, (donated_at AT TIME ZONE 'UTC')::date, tenant_id, COUNT(id), SUM(amount)
+        FROM campaign_donations
+        WHERE status = 'SUCCESS' AND donated_at IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_donation_daily_stats_tenant_day', table_name='donation_daily_stats')
+    op.drop_table('donation_daily_stats')
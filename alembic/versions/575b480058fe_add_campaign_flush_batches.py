@@ -0,0 +1,34 @@
+"""add campaign_flush_batches
+
+Revision ID: 575b480058fe
+Revises: 0e5e22f54153
+Create Date: 2026-10-18 16:12:37.284519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '575b480058fe'
+down_revision: Union[str, Sequence[str], None] = '0e5e22f54153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('campaign_flush_batches',
+    sa.Column('batch_id', sa.String(length=32), nullable=False),
+    sa.Column('applied_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('batch_id')
+    )
+    op.create_index('ix_campaign_flush_batches_applied_at', 'campaign_flush_batches', ['applied_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_campaign_flush_batches_applied_at', table_name='campaign_flush_batches')
+    op.drop_table('campaign_flush_batches')
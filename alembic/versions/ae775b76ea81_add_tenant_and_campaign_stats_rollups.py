@@ -0,0 +1,88 @@
+"""add tenant_stats and campaign_stats rollup tables
+
+Revision ID: ae775b76ea81
+Revises: eca4b53e9e7e
+Create Date: 2026-10-18 11:40:05.731942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ae775b76ea81'
+down_revision: Union[str, Sequence[str], None] = 'eca4b53e9e7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tenant_stats',
+    sa.Column('tenant_id', sa.UUID(), nullable=False),
+    sa.Column('total_campaigns', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('active_campaigns', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_goal_amount', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.Column('total_raised', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.Column('success_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('donor_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_donation_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('tenant_id')
+    )
+    op.create_table('campaign_stats',
+    sa.Column('campaign_id', sa.UUID(), nullable=False),
+    sa.Column('tenant_id', sa.UUID(), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.Column('success_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('donor_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_donation_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('campaign_id')
+    )
+    op.create_index(op.f('ix_campaign_stats_tenant_id'), 'campaign_stats', ['tenant_id'], unique=False)
+    # Lets the callbacks check "first successful gift from this email to this tenant" with an index probe
+    op.create_index('ix_campaign_donations_tenant_donor_email', 'campaign_donations', ['tenant_id', 'donor_email'])
+
+    # Backfill from the live tables, same numbers as app.features.stats.rollups.rebuild_rollups
+    op.execute("""
+        INSERT INTO campaign_stats (campaign_id, tenant_id, total_amount, success_count, donor_count, last_donation_at)
+        SELECT c.id, c.tenant_id, COALESCE(SUM(d.amount), 0), COUNT(d.id), COUNT(DISTINCT d.donor_email),
+               MAX(d.donated_at)
+        FROM campaigns c
+        LEFT JOIN campaign_donations d ON d.campaign_id = c.id AND d.status = 'SUCCESS'
+        GROUP BY c.id
+    """)
+    op.execute("""
+        INSERT INTO tenant_stats (tenant_id, total_campaigns, active_campaigns, total_goal_amount, total_raised,
+                                  success_count, donor_count, last_donation_at)
+        SELECT t.id,
+               COALESCE(c.total_campaigns, 0), COALESCE(c.active_campaigns, 0),
+               COALESCE(c.total_goal_amount, 0), COALESCE(c.total_raised, 0),
+               COALESCE(d.success_count, 0), COALESCE(d.donor_count, 0), d.last_donation_at
+        FROM tenants t
+        LEFT JOIN (
+            SELECT tenant_id, COUNT(id) AS total_campaigns,
+                   COUNT(id) FILTER (WHERE status = 'active') AS active_campaigns,
+                   SUM(goal_amount) AS total_goal_amount, SUM(current_amount) AS total_raised
+            FROM campaigns GROUP BY tenant_id
+        ) c ON c.tenant_id = t.id
+        LEFT JOIN (
+            SELECT tenant_id, COUNT(id) AS success_count, COUNT(DISTINCT donor_email) AS donor_count,
+                   MAX(donated_at) AS last_donation_at
+            FROM campaign_donations WHERE status = 'SUCCESS' GROUP BY tenant_id
+        ) d ON d.tenant_id = t.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_campaign_donations_tenant_donor_email', table_name='campaign_donations')
+    op.drop_index(op.f('ix_campaign_stats_tenant_id'), table_name='campaign_stats')
+    op.drop_table('campaign_stats')
+    op.drop_table('tenant_stats')
@@ -0,0 +1,48 @@
+"""add donation and campaign access pattern indexes
+
+Revision ID: eca4b53e9e7e
+Revises: bc76c485e684
+Create Date: 2026-10-18 09:12:44.218530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'eca4b53e9e7e'
+down_revision: Union[str, Sequence[str], None] = 'bc76c485e684'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns) - keep in sync with __table_args__ on Donation and Campaign
+INDEXES = [
+    # dashboard stats / list_donations by tenant and status, newest first
+    ("ix_campaign_donations_tenant_status_donated_at", "campaign_donations", ["tenant_id", "status", "donated_at"]),
+    # public donor wall for a campaign
+    ("ix_campaign_donations_campaign_donated_at", "campaign_donations", ["campaign_id", "donated_at"]),
+    # unique donor counts per campaign
+    ("ix_campaign_donations_campaign_donor_email", "campaign_donations", ["campaign_id", "donor_email"]),
+    # get_campaigns_by_tenant_id
+    ("ix_campaigns_tenant_created_at", "campaigns", ["tenant_id", "created_at"]),
+    # dashboard top performing campaigns
+    ("ix_campaigns_tenant_status", "campaigns", ["tenant_id", "status"]),
+    # keyset pagination of the public campaign listing
+    ("ix_campaigns_created_at_id", "campaigns", ["created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction, but avoids locking writes on large tables
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
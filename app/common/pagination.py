@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.common.handle_error import handle_error
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class CursorPagination(BaseModel):
+    limit: int
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+def encode_cursor(sort_value: datetime, row_id: UUID) -> str:
+    """
+    Build an opaque keyset cursor from the last row of a page.
+
+    Args:
+        sort_value (datetime): Value of the sort column on the last row.
+        row_id (UUID): ID of the last row, breaks ties on equal sort values.
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    raw = json.dumps({"v": sort_value.isoformat(), "id": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["v"]), UUID(data["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        handle_error(400, "Invalid pagination cursor", e)
+
+
+def next_page(rows: list, limit: int, sort_attr: str) -> tuple[list, Optional[str]]:
+    # Callers fetch limit + 1 rows, the extra row only tells us another page exists
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_attr), last.id)
@@ -2,8 +2,10 @@ import os
 from typing import Optional
 
 import redis
+import redis.asyncio as async_redis
 
 _redis_client: Optional[redis.Redis] = None
+_async_redis_client: Optional[async_redis.Redis] = None
 
 
 def get_redis() -> Optional[redis.Redis]:
@@ -21,3 +23,16 @@ def get_redis() -> Optional[redis.Redis]:
         return _redis_client
     except Exception:
         return None
+
+
+def get_async_redis() -> Optional[async_redis.Redis]:
+    # asyncio client for pub/sub and other calls made from the event loop, connects lazily on first command
+    global _async_redis_client
+    if _async_redis_client is not None:
+        return _async_redis_client
+
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        return None
+    _async_redis_client = async_redis.from_url(redis_url, decode_responses=True)
+    return _async_redis_client
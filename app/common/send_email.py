@@ -1,8 +1,10 @@
 from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formataddr
 
-from fastapi_mail import MessageSchema, MessageType, FastMail, ConnectionConfig
 from pydantic import BaseModel, EmailStr
 
+from app.common.smtp_pool import smtp_pool
 from app.config import settings
 from app.logger import logger
 from app.services.template_renderer import render_template
@@ -14,20 +16,6 @@ class SendEmailSchema(BaseModel):
     context: dict
 
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
-)
-
-
 async def send_mail(email: EmailStr, data: SendEmailSchema):
     try:
         subject = data.subject
@@ -35,15 +23,14 @@ async def send_mail(email: EmailStr, data: SendEmailSchema):
 
         html_body = render_template(f"{template_name}.html.j2", data.context)
 
-        message = MessageSchema(
-            subject=subject,
-            recipients=[email],
-            body=html_body,  # use body for HTML content
-            subtype=MessageType.html
-        )
+        message = EmailMessage()
+        message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+        message["To"] = email
+        message["Subject"] = subject
+        message.set_content(html_body, subtype="html")
 
-        fm = FastMail(conf)
-        await fm.send_message(message)
+        # Sent over a pooled, already authenticated SMTP session
+        await smtp_pool.send_message(message)
 
         logger.info(f"Email sent successfully → {email} | subject={subject}")
         return {"status": "success", "recipient": email, "subject": subject}
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from typing import AsyncIterator
+
+import aiosmtplib
+
+from app.config import settings
+from app.logger import logger
+
+# Raised while opening a session, before MAIL FROM, so connecting again can't send a message twice. The same errors
+# during DATA may come after the server queued the message and are never retried.
+RECONNECT_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, aiosmtplib.SMTPTimeoutError,
+                    ConnectionError)
+
+# A pooled session unused for longer than this is checked with NOOP before a message goes out on it
+PROBE_AFTER_SECONDS = 5
+
+
+@dataclass
+class PooledConnection:
+    smtp: aiosmtplib.SMTP
+    sent: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SMTPPool:
+    """
+    Authenticated SMTP sessions kept open and reused across messages, so a send skips connect, STARTTLS and login.
+
+    At most `size` sessions are open against the server at once, senders beyond that wait for a free one. A session is
+    retired after `max_messages` sends or `idle_timeout` seconds unused (servers drop idle clients on their own), and
+    opening a session is retried once. Sends themselves are not retried, a failure during DATA may come after the server
+    accepted the message.
+    """
+
+    def __init__(
+            self,
+            hostname: str,
+            port: int,
+            username: str,
+            password: str,
+            start_tls: bool = True,
+            validate_certs: bool = True,
+            size: int = settings.SMTP_POOL_SIZE,
+            max_messages: int = settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+            idle_timeout: float = settings.SMTP_IDLE_TIMEOUT_SECONDS,
+            timeout: float = settings.SMTP_TIMEOUT_SECONDS,
+    ):
+        self.options = dict(hostname=hostname, port=port, username=username, password=password,
+                            start_tls=start_tls, validate_certs=validate_certs, timeout=timeout)
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self._idle: list[PooledConnection] = []
+        self._slots = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop rather than the one active at import time
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        return self._slots
+
+    async def _connect(self) -> PooledConnection:
+        for attempt in range(2):
+            smtp = aiosmtplib.SMTP(**self.options)
+            try:
+                # Connects, upgrades with STARTTLS and logs in
+                await smtp.connect()
+                return PooledConnection(smtp)
+            except RECONNECT_ERRORS as e:
+                smtp.close()
+                if attempt:
+                    raise
+                logger.warning(f"SMTP connect failed ({e!r}), retrying")
+
+    async def _discard(self, connection: PooledConnection) -> None:
+        try:
+            await connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    async def _checkout(self) -> PooledConnection:
+        # Most recently used first, the oldest sessions are the ones left to idle out
+        while self._idle:
+            connection = self._idle.pop()
+            idle_for = time.monotonic() - connection.last_used
+            if connection.smtp.is_connected and idle_for < self.idle_timeout:
+                if idle_for < PROBE_AFTER_SECONDS:
+                    return connection
+                # The server may have dropped it without us noticing, find out before MAIL FROM rather than during DATA
+                try:
+                    await connection.smtp.noop()
+                    return connection
+                except (aiosmtplib.SMTPException, ConnectionError):
+                    pass
+            await self._discard(connection)
+        return await self._connect()
+
+    def _checkin(self, connection: PooledConnection) -> None:
+        connection.last_used = time.monotonic()
+        self._idle.append(connection)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[PooledConnection]:
+        async with self.slots:
+            connection = await self._checkout()
+            try:
+                yield connection
+            except aiosmtplib.SMTPResponseException:
+                # The server answered (bad recipient, rejected content...), the session itself is still usable
+                if connection.smtp.is_connected:
+                    self._checkin(connection)
+                else:
+                    await self._discard(connection)
+                raise
+            except BaseException:
+                await self._discard(connection)
+                raise
+            else:
+                connection.sent += 1
+                if connection.sent >= self.max_messages:
+                    await self._discard(connection)
+                else:
+                    self._checkin(connection)
+
+    async def send_message(self, message: EmailMessage) -> None:
+        async with self.connection() as connection:
+            await connection.smtp.send_message(message)
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+
+smtp_pool = SMTPPool(
+    hostname=settings.MAIL_SERVER,
+    port=int(settings.MAIL_PORT),
+    username=settings.MAIL_USERNAME,
+    password=settings.MAIL_PASSWORD,
+)
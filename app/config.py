@@ -8,6 +8,11 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
     ALGORITHM: str = "HS256"
     REFRESH_TOKEN_EXPIRE_MINUTES: int
     cloudinary_cloud_name: str
@@ -20,14 +25,43 @@ class Settings(BaseSettings):
     MPESA_CONSUMER_SECRET: str
     MPESA_SHORTCODE: str
     MPESA_PASSKEY: str
+    MPESA_TOKEN_REFRESH_MARGIN: int = 60
+    MPESA_CREDENTIAL_CACHE_TTL_SECONDS: int = 300
+    MPESA_HTTP_TIMEOUT: float = 30.0
+    MPESA_HTTP_CONNECT_TIMEOUT: float = 5.0
+    MPESA_HTTP_MAX_CONNECTIONS: int = 50
+    MPESA_HTTP_MAX_KEEPALIVE: int = 20
+    MPESA_HTTP_RETRIES: int = 2
+    MPESA_HTTP_RETRY_BACKOFF: float = 0.5
     ENCRYPTION_SECRET_KEY: str
     RABBITMQ_URL: str
+    RABBITMQ_PUBLISHER_CHANNELS: int = 4
+    RABBITMQ_PUBLISH_CONFIRM_WINDOW: int = 1000
+    PAYMENT_WORKER_CONCURRENCY: int = 10
+    CONSUMER_PREFETCH_COUNT: int = 20
+    CONSUMER_CONCURRENCY: int = 10
+    CONSUMER_DRAIN_TIMEOUT_SECONDS: int = 30
+    PAYMENT_EVENTS_HEARTBEAT_SECONDS: int = 15
+    PAYMENT_EVENTS_POLL_SECONDS: int = 3
+    PAYMENT_EVENTS_MAX_WAIT_SECONDS: int = 300
+    CAMPAIGN_WRITE_BEHIND_ENABLED: bool = False
+    CAMPAIGN_FLUSH_INTERVAL_MS: int = 500
+    RECONCILE_INTERVAL_SECONDS: int = 60
+    RECONCILE_STALE_AFTER_SECONDS: int = 120
+    RECONCILE_PAGE_SIZE: int = 500
+    RECONCILE_CONCURRENCY: int = 20
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
     MAIL_FROM: str
     MAIL_PORT: str
     MAIL_SERVER: str
     MAIL_FROM_NAME: str
+    SMTP_POOL_SIZE: int = 5
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_IDLE_TIMEOUT_SECONDS: int = 60
+    SMTP_TIMEOUT_SECONDS: float = 30.0
+    # Unset -> a per-user directory under the system temp dir
+    TEMPLATE_BYTECODE_CACHE_DIR: str | None = None
     FRONTEND_URL: HttpUrl
 
     class Config:
@@ -1,6 +1,10 @@
 from app.features.auth import models as user_models
 from app.features.campaign import models as campaign_models
 from app.features.donation import models as donation_models
+from app.features.payments import models as payment_models
+from app.features.payments.mpesa import models as mpesa_models
+from app.features.stats import models as stats_models
 from app.features.tenant import models as tenant_models
 
-__all__ = ["campaign_models", "tenant_models", "user_models", "donation_models"]
+__all__ = ["campaign_models", "tenant_models", "user_models", "donation_models", "mpesa_models",
+           "payment_models", "stats_models"]
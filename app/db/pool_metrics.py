@@ -0,0 +1,96 @@
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Upper bounds (ms) of the checkout wait histogram buckets, the last bucket is +Inf
+CHECKOUT_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """
+    Thread-safe counters for one connection pool.
+
+    Tracks how long callers waited to get a connection out of the pool and how often they gave up,
+    live occupancy is read from the pool itself when a snapshot is taken.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._buckets = [0] * (len(CHECKOUT_WAIT_BUCKETS_MS) + 1)
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_sum_ms = 0.0
+        self._wait_max_ms = 0.0
+
+    def observe_checkout(self, seconds: float) -> None:
+        wait_ms = seconds * 1000
+        with self._lock:
+            self._buckets[bisect_left(CHECKOUT_WAIT_BUCKETS_MS, wait_ms)] += 1
+            self._checkouts += 1
+            self._wait_sum_ms += wait_ms
+            self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            # Cumulative counts, same shape as a Prometheus histogram
+            histogram = {}
+            running = 0
+            for bound, count in zip((*CHECKOUT_WAIT_BUCKETS_MS, "+Inf"), self._buckets):
+                running += count
+                histogram[str(bound)] = running
+            checkouts = self._checkouts
+            wait = {
+                "count": checkouts,
+                "sum_ms": round(self._wait_sum_ms, 3),
+                "avg_ms": round(self._wait_sum_ms / checkouts, 3) if checkouts else 0.0,
+                "max_ms": round(self._wait_max_ms, 3),
+                "buckets_ms": histogram,
+            }
+            timeouts = self._timeouts
+
+        return {
+            "pool": {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "timeout_seconds": pool.timeout(),
+            },
+            "checkouts": checkouts,
+            "checkout_timeouts": timeouts,
+            "checkout_wait": wait,
+        }
+
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+
+class _TimedCheckoutMixin:
+    metrics: PoolMetrics
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.observe_checkout(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    metrics = sync_pool_metrics
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy import select, func, case
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 
 from app.common.deps import require_platform_admin
-from app.db.index import get_db
+from app.db.index import get_db, get_pool_stats
 from app.features.admin.schemas import TenantOut
 from app.features.auth.models import User
-from app.features.campaign.models import Campaign, CampaignStatus
+from app.features.stats.models import TenantStats
 from app.features.tenant.models import Tenant
 
 router = APIRouter()
@@ -19,28 +19,14 @@ def get_tenants(
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=200),
 ):
-    subq = (
-        select(
-            Campaign.tenant_id.label("tenant_id"),
-            func.count(func.distinct(Campaign.id)).label("total_campaigns"),
-            func.coalesce(func.sum(Campaign.current_amount), 0).label("total_raised"),
-            func.coalesce(
-                func.sum(case((Campaign.status == CampaignStatus.active, 1), else_=0)),
-                0,
-            ).label("active_campaigns"),
-        )
-        .group_by(Campaign.tenant_id)
-        .subquery()
-    )
-
     stmt = (
         select(
             Tenant,
-            func.coalesce(subq.c.total_campaigns, 0).label("total_campaigns"),
-            func.coalesce(subq.c.total_raised, 0).label("total_raised"),
-            func.coalesce(subq.c.active_campaigns, 0).label("active_campaigns"),
+            func.coalesce(TenantStats.total_campaigns, 0).label("total_campaigns"),
+            func.coalesce(TenantStats.total_raised, 0).label("total_raised"),
+            func.coalesce(TenantStats.active_campaigns, 0).label("active_campaigns"),
         )
-        .outerjoin(subq, Tenant.id == subq.c.tenant_id)
+        .outerjoin(TenantStats, Tenant.id == TenantStats.tenant_id)
         .offset(skip)
         .limit(limit)
     )
@@ -89,28 +75,14 @@ def get_tenant(
         db: Session = Depends(get_db),
         current_user: User = Depends(require_platform_admin),
 ):
-    subq = (
-        select(
-            Campaign.tenant_id.label("tenant_id"),
-            func.count(func.distinct(Campaign.id)).label("total_campaigns"),
-            func.coalesce(func.sum(Campaign.current_amount), 0).label("total_raised"),
-            func.coalesce(
-                func.sum(case((Campaign.status == CampaignStatus.active, 1), else_=0)),
-                0,
-            ).label("active_campaigns"),
-        )
-        .group_by(Campaign.tenant_id)
-        .subquery()
-    )
-
     stmt = (
         select(
             Tenant,
-            func.coalesce(subq.c.total_campaigns, 0).label("total_campaigns"),
-            func.coalesce(subq.c.total_raised, 0).label("total_raised"),
-            func.coalesce(subq.c.active_campaigns, 0).label("active_campaigns"),
+            func.coalesce(TenantStats.total_campaigns, 0).label("total_campaigns"),
+            func.coalesce(TenantStats.total_raised, 0).label("total_raised"),
+            func.coalesce(TenantStats.active_campaigns, 0).label("active_campaigns"),
         )
-        .outerjoin(subq, Tenant.id == subq.c.tenant_id)
+        .outerjoin(TenantStats, Tenant.id == TenantStats.tenant_id)
         .where(Tenant.id == tenant_id)
     )
 
@@ -150,3 +122,8 @@ def get_tenant(
     }
 
     return result
+
+
+@router.get("/metrics/db-pool")
+def get_db_pool_metrics(current_user: User = Depends(require_platform_admin)):
+    return get_pool_stats()
@@ -0,0 +1,302 @@
+import asyncio
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+
+from redis.exceptions import ResponseError
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.redis import get_async_redis, get_redis
+from app.config import settings
+from app.db.index import AsyncSessionLocal
+from app.features.campaign.models import CampaignFlushBatch
+from app.features.campaign.services import increment_campaign_amount, add_campaign_amounts
+from app.features.donation.models import Donation
+from app.features.stats.rollups import DonationDelta, donation_delta, record_successful_donation, \
+    apply_rollup_increments
+from app.logger import logger
+
+DIRTY_KEY = "campaign:pending:dirty"
+FLUSHING_DIRTY_KEY = "campaign:pending:dirty:flushing"
+FLUSH_LOCK_KEY = "campaign:pending:flush-lock"
+FLUSH_BATCH_KEY = "campaign:pending:flush-batch"
+# Applied batch ids only matter until their snapshots are deleted, a day is plenty
+FLUSH_BATCH_RETENTION = timedelta(days=1)
+# Amounts are buffered as integer cents, float increments would drift away from the NUMERIC totals
+CENTS = Decimal("100")
+
+
+def pending_key(campaign_id) -> str:
+    return f"campaign:pending:{campaign_id}"
+
+
+def flushing_key(campaign_id) -> str:
+    return f"campaign:pending:{campaign_id}:flushing"
+
+
+def as_utc(value: datetime) -> datetime:
+    # Naive timestamps are taken as UTC, mixing them with aware ones would break comparisons and day buckets
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def parse_utc(value: str) -> datetime:
+    return as_utc(datetime.fromisoformat(value))
+
+
+def write_behind_enabled() -> bool:
+    return settings.CAMPAIGN_WRITE_BEHIND_ENABLED and get_async_redis() is not None
+
+
+async def apply_successful_donation(db: AsyncSession, donation: Donation, amount: Decimal) -> Optional[DonationDelta]:
+    """
+    Add a successful donation to its campaign total and the stats rollups.
+
+    With write-behind disabled the increments run in the caller's transaction and None is returned. With it
+    enabled nothing hot is locked, the delta is returned and must be passed to buffer_donation after commit.
+    """
+    if not write_behind_enabled():
+        await increment_campaign_amount(db, donation.campaign_id, amount)
+        await record_successful_donation(db, donation, amount)
+        return None
+    return await donation_delta(db, donation, amount)
+
+
+async def apply_donation_deltas(db: AsyncSession, deltas: list[DonationDelta]) -> list[DonationDelta]:
+    """
+    Batch form of apply_successful_donation for donations settled together, e.g. by reconciliation.
+
+    Takes deltas from donation_delta, computed before the donations were marked SUCCESS. Returns the deltas still
+    to be passed to buffer_donation after commit, empty if they were applied inline.
+    """
+    if write_behind_enabled():
+        return deltas
+    snapshots: dict[UUID, dict] = {}
+    for delta in deltas:
+        _merge_snapshot(snapshots.setdefault(delta.campaign_id, {}), _delta_as_snapshot(delta))
+    await apply_deltas(db, snapshots)
+    return []
+
+
+async def buffer_donation(delta: Optional[DonationDelta]) -> None:
+    """Queue a committed donation's delta for the flusher. Applies it straight to Postgres if Redis fails."""
+    if delta is None:
+        return
+    donated_at = as_utc(delta.donated_at)
+    day = donated_at.date().isoformat()
+    key = pending_key(delta.campaign_id)
+    try:
+        async with get_async_redis().pipeline(transaction=True) as pipe:
+            pipe.hset(key, "tenant_id", str(delta.tenant_id))
+            pipe.hincrby(key, "amount_cents", int(delta.amount * CENTS))
+            pipe.hincrby(key, "success_count", 1)
+            pipe.hincrby(key, "campaign_donors", int(delta.new_campaign_donor))
+            pipe.hincrby(key, "tenant_donors", int(delta.new_tenant_donor))
+            pipe.hset(key, "last_donation_at", donated_at.isoformat())
+            pipe.hincrby(key, f"day:{day}:amount_cents", int(delta.amount * CENTS))
+            pipe.hincrby(key, f"day:{day}:count", 1)
+            pipe.sadd(DIRTY_KEY, str(delta.campaign_id))
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Buffering donation totals failed, writing through: {e}")
+        async with AsyncSessionLocal() as db:
+            await apply_deltas(db, {delta.campaign_id: _delta_as_snapshot(delta)})
+            await db.commit()
+
+
+def _delta_as_snapshot(delta: DonationDelta) -> dict:
+    # Same fields buffer_donation writes to the Redis hash
+    donated_at = as_utc(delta.donated_at)
+    day = donated_at.date().isoformat()
+    cents = str(int(delta.amount * CENTS))
+    return {
+        "tenant_id": str(delta.tenant_id),
+        "amount_cents": cents,
+        "success_count": "1",
+        "campaign_donors": str(int(delta.new_campaign_donor)),
+        "tenant_donors": str(int(delta.new_tenant_donor)),
+        "last_donation_at": donated_at.isoformat(),
+        f"day:{day}:amount_cents": cents,
+        f"day:{day}:count": "1",
+    }
+
+
+def _merge_snapshot(merged: dict, fields: dict) -> None:
+    for field, value in fields.items():
+        if field == "tenant_id":
+            merged[field] = value
+        elif field == "last_donation_at":
+            merged[field] = max(merged.get(field, value), value, key=parse_utc)
+        else:
+            merged[field] = str(int(merged.get(field, 0)) + int(value))
+
+
+async def apply_deltas(db: AsyncSession, snapshots: dict[UUID, dict]) -> None:
+    """Apply buffered per-campaign hashes to campaigns and the rollups, one executemany per table."""
+    amounts: dict[UUID, Decimal] = {}
+    campaign_rows, daily_rows = [], []
+    tenant_totals = defaultdict(lambda: {"total_raised": Decimal(0), "success_count": 0, "donor_count": 0,
+                                         "last_donation_at": None})
+
+    for campaign_id, fields in snapshots.items():
+        tenant_id = UUID(fields["tenant_id"])
+        amount = Decimal(int(fields.get("amount_cents", 0))) / CENTS
+        success_count = int(fields.get("success_count", 0))
+        # Parsed as UTC, snapshots buffered before timestamps were normalised may hold naive values
+        last_donation_at = parse_utc(fields["last_donation_at"])
+        amounts[campaign_id] = amount
+        campaign_rows.append({
+            "campaign_id": campaign_id,
+            "tenant_id": tenant_id,
+            "total_amount": amount,
+            "success_count": success_count,
+            "donor_count": int(fields.get("campaign_donors", 0)),
+            "last_donation_at": last_donation_at,
+        })
+
+        tenant = tenant_totals[tenant_id]
+        tenant["total_raised"] += amount
+        tenant["success_count"] += success_count
+        tenant["donor_count"] += int(fields.get("tenant_donors", 0))
+        tenant["last_donation_at"] = max(filter(None, [tenant["last_donation_at"], last_donation_at]))
+
+        for field, value in fields.items():
+            if field.startswith("day:") and field.endswith(":count"):
+                day = field.split(":")[1]
+                daily_rows.append({
+                    "campaign_id": campaign_id,
+                    "tenant_id": tenant_id,
+                    "day": date.fromisoformat(day),
+                    "donation_count": int(value),
+                    "total_amount": Decimal(int(fields.get(f"day:{day}:amount_cents", 0))) / CENTS,
+                })
+
+    await add_campaign_amounts(db, amounts)
+    await apply_rollup_increments(
+        db,
+        campaign_rows,
+        [{"tenant_id": tenant_id, **totals} for tenant_id, totals in tenant_totals.items()],
+        daily_rows,
+    )
+
+
+async def claim_flush_batch(db: AsyncSession, batch_id: str) -> bool:
+    """Record batch_id in the flush transaction, False if an earlier flush already applied it."""
+    claimed = (await db.execute(
+        insert(CampaignFlushBatch)
+        .values(batch_id=batch_id)
+        .on_conflict_do_nothing(index_elements=[CampaignFlushBatch.batch_id])
+        .returning(CampaignFlushBatch.batch_id)
+    )).scalar_one_or_none()
+    await db.execute(
+        delete(CampaignFlushBatch).where(CampaignFlushBatch.applied_at < func.now() - FLUSH_BATCH_RETENTION)
+    )
+    return claimed is not None
+
+
+async def flush_pending_totals() -> int:
+    """
+    Move buffered deltas into Postgres, returns how many campaigns were flushed.
+
+    The dirty set and each campaign hash are RENAMEd aside before reading, so increments that land mid-flush go to a
+    fresh hash and are picked up next time. Snapshots are deleted only after the transaction commits, a failed flush
+    is retried from the same snapshots.
+
+    The set of snapshots gets a batch id that is written in the same transaction as the increments. A flush that
+    replays it, after a crash between commit and delete, or from a second process once the lock expired under a
+    slow flush, finds the id already applied and only cleans up.
+    """
+    redis = get_async_redis()
+    token = uuid.uuid4().hex
+    # One flusher at a time across API processes, the lock expires on its own if the holder dies
+    if not await redis.set(FLUSH_LOCK_KEY, token, nx=True, px=max(settings.CAMPAIGN_FLUSH_INTERVAL_MS * 10, 5000)):
+        return 0
+    try:
+        if not await redis.exists(FLUSHING_DIRTY_KEY):
+            try:
+                await redis.rename(DIRTY_KEY, FLUSHING_DIRTY_KEY)
+            except ResponseError:
+                return 0  # nothing buffered
+
+        # Kept until the snapshots are deleted, so every retry of this window reuses the same id
+        await redis.set(FLUSH_BATCH_KEY, uuid.uuid4().hex, nx=True)
+        batch_id = await redis.get(FLUSH_BATCH_KEY)
+
+        campaign_ids = list(await redis.smembers(FLUSHING_DIRTY_KEY))
+        async with redis.pipeline(transaction=False) as pipe:
+            for campaign_id in campaign_ids:
+                # RENAMENX keeps a snapshot left by a failed flush instead of overwriting it
+                pipe.renamenx(pending_key(campaign_id), flushing_key(campaign_id))
+            await pipe.execute(raise_on_error=False)
+        async with redis.pipeline(transaction=False) as pipe:
+            for campaign_id in campaign_ids:
+                pipe.hgetall(flushing_key(campaign_id))
+            hashes = await pipe.execute()
+
+        snapshots = {UUID(campaign_id): fields for campaign_id, fields in zip(campaign_ids, hashes) if fields}
+        applied = 0
+        if snapshots:
+            async with AsyncSessionLocal() as db:
+                if await claim_flush_batch(db, batch_id):
+                    await apply_deltas(db, snapshots)
+                    applied = len(snapshots)
+                else:
+                    logger.warning(f"Campaign totals batch {batch_id} was already applied, discarding its snapshots")
+                await db.commit()
+
+        await redis.delete(
+            *[flushing_key(campaign_id) for campaign_id in campaign_ids], FLUSHING_DIRTY_KEY, FLUSH_BATCH_KEY
+        )
+        return applied
+    finally:
+        if await redis.get(FLUSH_LOCK_KEY) == token:
+            await redis.delete(FLUSH_LOCK_KEY)
+
+
+async def run_flusher(stop: asyncio.Event) -> None:
+    interval = settings.CAMPAIGN_FLUSH_INTERVAL_MS / 1000
+    while not stop.is_set():
+        try:
+            await flush_pending_totals()
+        except Exception as e:
+            logger.error(f"Flushing campaign totals failed: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+    # Drain what is left before shutting down
+    try:
+        await flush_pending_totals()
+    except Exception as e:
+        logger.error(f"Final flush of campaign totals failed: {e}")
+
+
+def fetch_pending_totals(campaign_ids: list[UUID]) -> dict[UUID, tuple[Decimal, int]]:
+    """Buffered (amount, new donors) per campaign that the flusher hasn't written yet, for read paths."""
+    redis = get_redis()
+    if not settings.CAMPAIGN_WRITE_BEHIND_ENABLED or not redis or not campaign_ids:
+        return {}
+    try:
+        pipe = redis.pipeline(transaction=False)
+        for campaign_id in campaign_ids:
+            # The snapshot being flushed right now is still pending too
+            for key in (pending_key(campaign_id), flushing_key(campaign_id)):
+                pipe.hmget(key, "amount_cents", "campaign_donors")
+        values = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Reading pending campaign totals failed: {e}")
+        return {}
+
+    pending = {}
+    for index, campaign_id in enumerate(campaign_ids):
+        cents = donors = 0
+        for amount_cents, campaign_donors in values[index * 2:index * 2 + 2]:
+            cents += int(amount_cents or 0)
+            donors += int(campaign_donors or 0)
+        if cents or donors:
+            pending[campaign_id] = (Decimal(cents) / CENTS, donors)
+    return pending
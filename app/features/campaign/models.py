@@ -1,7 +1,7 @@
 import uuid
 from enum import Enum
 
-from sqlalchemy import UUID, Column, String, Text, Numeric, DateTime, ForeignKey, Enum as SQLAEnum
+from sqlalchemy import UUID, Column, String, Text, Numeric, DateTime, ForeignKey, Enum as SQLAEnum, Index, func
 from sqlalchemy.orm import relationship
 
 from app.db.index import Base
@@ -30,3 +30,21 @@ class Campaign(Base, TimestampMixin):
     # Join with tenant
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
     tenant = relationship("Tenant", backref="campaigns")
+
+    __table_args__ = (
+        Index("ix_campaigns_tenant_created_at", "tenant_id", "created_at"),
+        Index("ix_campaigns_tenant_status", "tenant_id", "status"),
+        Index("ix_campaigns_created_at_id", "created_at", "id"),
+    )
+
+
+class CampaignFlushBatch(Base):
+    """Write-behind flushes already applied, so a flush replayed after a lock expiry or crash is skipped."""
+    __tablename__ = "campaign_flush_batches"
+
+    batch_id = Column(String(32), primary_key=True)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_campaign_flush_batches_applied_at", "applied_at"),
+    )
@@ -1,18 +1,21 @@
 import uuid
-from typing import List
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, UploadFile, File
+from fastapi import APIRouter, Depends, UploadFile, File, Query
 from sqlalchemy.orm import Session
 
 from app.common.deps import require_tenant_admin
 from app.common.handle_error import handle_error
+from app.common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.common.upload import upload_image
-from app.features.campaign.serializers import serialize_campaign
+from app.features.campaign.serializers import serialize_campaign, serialize_campaigns
 from app.db.index import get_db
-from app.features.campaign.schemas import CampaignOut, CampaignCreate, CampaignUpdate
+from app.features.campaign.schemas import CampaignOut, CampaignCreate, CampaignUpdate, CampaignListOut, \
+    CampaignStatus
 from app.features.campaign.services import fetch_campaigns, fetch_campaign, fetch_campaign_by_title, \
     create_new_campaign, update_campaign_data
+from app.features.stats.rollups import refresh_tenant_campaign_totals
 
 router = APIRouter()
 
@@ -23,14 +26,26 @@ Public routes:
 """
 
 
-@router.get("/", response_model=List[CampaignOut])
-def get_campaigns(db: Session = Depends(get_db)):
-    campaigns = fetch_campaigns(db=db)
+@router.get("/", response_model=CampaignListOut)
+def get_campaigns(
+        db: Session = Depends(get_db),
+        cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Number of results per page"),
+        status: Optional[CampaignStatus] = Query(None, description="Filter by campaign status"),
+        tenant_id: Optional[UUID] = Query(None, description="Filter by tenant"),
+        active_only: bool = Query(False, description="Only campaigns running right now"),
+):
+    campaigns, next_cursor = fetch_campaigns(
+        db=db, active_only=active_only, status=status, tenant_id=tenant_id, cursor=cursor, limit=limit
+    )
 
     if not campaigns:
         handle_error(404, "No campaigns found")
 
-    return [serialize_campaign(campaign, db) for campaign in campaigns]
+    return {
+        "campaigns": serialize_campaigns(campaigns, db),
+        "pagination": {"limit": limit, "next_cursor": next_cursor},
+    }
 
 
 # Get Campaign By ID
@@ -143,5 +158,7 @@ def delete_campaign(
         handle_error(403, "You can only delete your own campaign")
 
     db.delete(campaign)
+    db.flush()
+    refresh_tenant_campaign_totals(db, tenant.id)
     db.commit()
     return {"message": "Campaign deleted successfully"}
@@ -1,12 +1,14 @@
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 from fastapi import Form, UploadFile, File
 from pydantic import BaseModel, HttpUrl
 
+from app.common.pagination import CursorPagination
+
 
 class CampaignStatus(str, Enum):
     active = "active"
@@ -64,6 +66,11 @@ class CampaignOut(BaseModel):
         from_attributes = True
 
 
+class CampaignListOut(BaseModel):
+    campaigns: List[CampaignOut]
+    pagination: CursorPagination
+
+
 # stats
 class CampaignStats(BaseModel):
     percent_funded: float
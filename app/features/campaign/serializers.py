@@ -1,31 +1,42 @@
 from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
 
 from sqlalchemy.orm import Session
 
-from app.features.donation.models import Donation
+from app.features.campaign.counters import fetch_pending_totals
 from app.features.campaign.models import Campaign
 from app.features.campaign.schemas import CampaignOut, TenantInCampaign
+from app.features.stats.models import CampaignStats
 
 
-def serialize_campaign(campaign: Campaign, db: Session) -> CampaignOut:
-    unique_donor_count = db.query(Donation.donor_email) \
-        .filter(Donation.campaign_id == campaign.id) \
-        .distinct() \
-        .count()
+def fetch_donor_counts(db: Session, campaign_ids: list[UUID]) -> dict[UUID, int]:
+    # One primary key lookup on the campaign_stats rollup for the whole page. total_donors is the number of
+    # distinct donor emails with a SUCCESS donation, pending and failed attempts don't count.
+    if not campaign_ids:
+        return {}
+    rows = db.query(CampaignStats.campaign_id, CampaignStats.donor_count) \
+        .filter(CampaignStats.campaign_id.in_(campaign_ids)) \
+        .all()
+    return {campaign_id: donor_count for campaign_id, donor_count in rows}
+
+
+def build_campaign_out(campaign: Campaign, total_donors: int, pending_amount: Decimal = Decimal(0)) -> CampaignOut:
+    current_amount = (campaign.current_amount or 0) + pending_amount
     return CampaignOut(
         id=campaign.id,
         title=campaign.title,
         description=campaign.description,
         goal_amount=campaign.goal_amount,
         status=campaign.status,
-        current_amount=campaign.current_amount,
+        current_amount=current_amount,
         start_date=campaign.start_date,
         end_date=campaign.end_date,
         image_url=campaign.image_url,
         tenant_id=campaign.tenant_id,
-        percent_funded=float((campaign.current_amount / campaign.goal_amount) * 100 if campaign.goal_amount else 0),
+        percent_funded=float((current_amount / campaign.goal_amount) * 100 if campaign.goal_amount else 0),
         days_left=max((campaign.end_date - datetime.now()).days if campaign.end_date else 0, 0),
-        total_donors=unique_donor_count,
+        total_donors=total_donors,
         created_at=campaign.created_at,
         updated_at=campaign.updated_at,
         tenant=TenantInCampaign(
@@ -36,3 +47,17 @@ def serialize_campaign(campaign: Campaign, db: Session) -> CampaignOut:
     )
 
 
+def serialize_campaigns(campaigns: list[Campaign], db: Session) -> list[CampaignOut]:
+    campaign_ids = [campaign.id for campaign in campaigns]
+    donor_counts = fetch_donor_counts(db, campaign_ids)
+    # Totals still buffered by the write-behind counters, empty when it is disabled
+    pending = fetch_pending_totals(campaign_ids)
+    results = []
+    for campaign in campaigns:
+        pending_amount, pending_donors = pending.get(campaign.id, (Decimal(0), 0))
+        results.append(build_campaign_out(campaign, donor_counts.get(campaign.id, 0) + pending_donors, pending_amount))
+    return results
+
+
+def serialize_campaign(campaign: Campaign, db: Session) -> CampaignOut:
+    return serialize_campaigns([campaign], db)[0]
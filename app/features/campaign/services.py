@@ -1,15 +1,23 @@
 from datetime import datetime
+from decimal import Decimal
 from uuid import UUID
 
+from sqlalchemy import select, tuple_, update, func, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
+from app.common.pagination import DEFAULT_PAGE_SIZE, decode_cursor, next_page
 from app.features.campaign.models import Campaign
+from app.features.campaign.schemas import CampaignStatus
+from app.features.stats.rollups import refresh_tenant_campaign_totals
 
 
 # Create Campaign
 def create_new_campaign(db: Session, data):
     campaign = Campaign(**data)
     db.add(campaign)
+    db.flush()
+    refresh_tenant_campaign_totals(db, campaign.tenant_id)
     db.commit()
     db.refresh(campaign)
     return campaign
@@ -21,25 +29,74 @@ def fetch_campaign(db: Session, campaign_id: UUID):
     return campaign
 
 
+async def fetch_campaign_async(db: AsyncSession, campaign_id: UUID):
+    result = await db.execute(select(Campaign).where(Campaign.id == campaign_id))
+    return result.scalar_one_or_none()
+
+
+# Add a successful donation to a campaign's total in one statement, safe under concurrent callbacks
+async def increment_campaign_amount(db: AsyncSession, campaign_id: UUID, amount: Decimal):
+    result = await db.execute(
+        update(Campaign)
+        .where(Campaign.id == campaign_id)
+        .values(current_amount=func.coalesce(Campaign.current_amount, 0) + amount)
+        .returning(Campaign.id, Campaign.tenant_id, Campaign.current_amount)
+        .execution_options(synchronize_session=False)
+    )
+    return result.one_or_none()
+
+
+# Add several campaigns' pending totals in one executemany, used by the write-behind flusher
+async def add_campaign_amounts(db: AsyncSession, amounts: dict[UUID, Decimal]) -> None:
+    if not amounts:
+        return
+    campaigns = Campaign.__table__
+    stmt = (
+        update(campaigns)
+        .where(campaigns.c.id == bindparam("b_campaign_id"))
+        .values(current_amount=func.coalesce(campaigns.c.current_amount, 0) + bindparam("b_amount"))
+    )
+    await db.execute(stmt, [
+        {"b_campaign_id": campaign_id, "b_amount": amount} for campaign_id, amount in amounts.items()
+    ])
+
+
 def fetch_campaign_by_title(db: Session, title: str):
     campaign = db.query(Campaign).filter(Campaign.title.ilike(title)).options(joinedload(Campaign.tenant)).first()
     return campaign
 
 
-# Get Campaigns
-def fetch_campaigns(db: Session, active_only: bool = False):
+# Get Campaigns -> keyset paginated on (created_at, id), newest first
+def fetch_campaigns(
+        db: Session,
+        active_only: bool = False,
+        status: CampaignStatus | None = None,
+        tenant_id: UUID | None = None,
+        cursor: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+):
     query = db.query(Campaign).options(joinedload(Campaign.tenant))
-    print("active only: ", active_only)
     if active_only:
         now = datetime.now()
         query = query.filter(Campaign.start_date <= now, Campaign.end_date >= now)
-    return query.all()
+    if status:
+        query = query.filter(Campaign.status == status.value)
+    if tenant_id:
+        query = query.filter(Campaign.tenant_id == tenant_id)
+    if cursor:
+        created_at, campaign_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Campaign.created_at, Campaign.id) < tuple_(created_at, campaign_id))
+
+    campaigns = query.order_by(Campaign.created_at.desc(), Campaign.id.desc()).limit(limit + 1).all()
+    return next_page(campaigns, limit, "created_at")
 
 
 # Update Campaign
 def update_campaign_data(db: Session, campaign_id: UUID, data):
     for key, value in data.items():
         setattr(db.query(Campaign).filter(Campaign.id == campaign_id).first(), key, value)
+    db.flush()
+    refresh_tenant_campaign_totals(db, db.query(Campaign.tenant_id).filter(Campaign.id == campaign_id).scalar())
     db.commit()
     return db.query(Campaign).filter(Campaign.id == campaign_id).first()
 
@@ -1,7 +1,7 @@
 import uuid
 from enum import Enum
 
-from sqlalchemy import Column, UUID, Numeric, String, ForeignKey, DateTime, func, Enum as SQLAEnum, JSON, Boolean
+from sqlalchemy import Column, UUID, Numeric, String, ForeignKey, DateTime, func, Enum as SQLAEnum, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 
 from app.db.index import Base
@@ -46,9 +46,21 @@ class Donation(Base):
     # Payment tracking
     method = Column(SQLAEnum(PaymentMethod), nullable=True)
     status = Column(SQLAEnum(PaymentStatus), default=PaymentStatus.PENDING)
+    # Provider payment reference shown to donors, the M-PESA receipt or Stripe's id
     transaction_id = Column(String(100), unique=True, nullable=True)
+    # Daraja's id for the STK push, what the callback is matched on
+    checkout_request_id = Column(String(100), nullable=True)
+    mpesa_receipt = Column(String(50), nullable=True)
     callback_data = Column(JSON, nullable=True)
 
     is_anonymous = Column(Boolean, default=False)
 
     donated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_campaign_donations_tenant_status_donated_at", "tenant_id", "status", "donated_at"),
+        Index("ix_campaign_donations_campaign_donated_at", "campaign_id", "donated_at"),
+        Index("ix_campaign_donations_campaign_donor_email", "campaign_id", "donor_email"),
+        Index("ix_campaign_donations_tenant_donor_email", "tenant_id", "donor_email"),
+        Index("ix_campaign_donations_checkout_request_id", "checkout_request_id", unique=True),
+    )
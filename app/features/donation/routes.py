@@ -1,16 +1,26 @@
 from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
-from sqlalchemy.orm import Session, joinedload
+from starlette.responses import StreamingResponse, JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from app.db.index import get_db
+from app.common.deps import require_tenant_admin
+from app.common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.db.index import get_db, get_async_db
 from app.features.campaign.models import Campaign
-from app.features.donation.models import Donation
-from app.features.donation.schemas import DonationOut, CreateDonation
+from app.features.campaign.services import fetch_campaign_async
+from app.features.donation.models import Donation, PaymentStatus, PaymentMethod
+from app.features.donation.schemas import DonationOut, CreateDonation, DonationListOut
+from app.features.donation.services import create_donation, fetch_donation_for_payment, build_donation_filters, \
+    fetch_donations, ExportFormat, export_donations_csv, export_donations_ndjson
+from app.features.donation.status_events import read_donation_status, stream_donation_status
+from app.features.payments.mpesa.services import has_active_integration, get_active_integration
 from app.features.payments.services import process_payment
-from app.services.rabbitmq.publisher import publish_donation_event
+from app.logger import logger
+from app.services.rabbitmq.publisher import publish_donation_event, publish_payment, RoutingKeys
 
 router = APIRouter()
 
@@ -31,8 +41,8 @@ async def test_donation(
 
 
 @router.post("/", response_model=DonationOut)
-async def make_donation(payload: CreateDonation, db: Session = Depends(get_db)):
-    campaign = db.query(Campaign).filter(Campaign.id == payload.campaign_id).first()
+async def make_donation(payload: CreateDonation, db: AsyncSession = Depends(get_async_db)):
+    campaign = await fetch_campaign_async(db, payload.campaign_id)
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
 
@@ -40,27 +50,24 @@ async def make_donation(payload: CreateDonation, db: Session = Depends(get_db)):
     if campaign.end_date and campaign.end_date < now:
         raise HTTPException(status_code=400, detail="This campaign has ended.")
 
-    donation = Donation(
-        tenant_id=payload.tenant_id,
-        campaign_id=payload.campaign_id,
-        amount=payload.amount,
-        donor_name=payload.donor_name,
-        donor_phone=payload.donor_phone,
-        donor_email=payload.donor_email,
-        message=payload.message,
-        method=payload.method,
-        is_anonymous=payload.is_anonymous,
-    )
-
-    db.add(donation)
-    db.commit()
-    db.refresh(donation)
+    donation = await create_donation(db, {
+        "tenant_id": payload.tenant_id,
+        "campaign_id": payload.campaign_id,
+        "amount": payload.amount,
+        "donor_name": payload.donor_name,
+        "donor_phone": payload.donor_phone,
+        "donor_email": payload.donor_email,
+        "message": payload.message,
+        "method": payload.method,
+        "is_anonymous": payload.is_anonymous,
+    })
+    donation.campaign = campaign
     return donation
 
 
 @router.post("/one-click")
-async def make_donation(payload: CreateDonation, db: Session = Depends(get_db)):
-    campaign = db.query(Campaign).filter(Campaign.id == payload.campaign_id).first()
+async def make_donation(payload: CreateDonation, db: AsyncSession = Depends(get_async_db)):
+    campaign = await fetch_campaign_async(db, payload.campaign_id)
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
 
@@ -68,38 +75,35 @@ async def make_donation(payload: CreateDonation, db: Session = Depends(get_db)):
     if campaign.end_date and campaign.end_date < now:
         raise HTTPException(status_code=400, detail="This campaign has ended.")
 
-    donation = Donation(
-        tenant_id=payload.tenant_id,
-        campaign_id=payload.campaign_id,
-        amount=payload.amount,
-        donor_name=payload.donor_name,
-        donor_phone=payload.donor_phone,
-        donor_email=payload.donor_email,
-        message=payload.message,
-        method=payload.method,
-        is_anonymous=payload.is_anonymous,
-        status="PENDING"
-    )
-
-    db.add(donation)
-    db.commit()
-    db.refresh(donation)
+    donation = await create_donation(db, {
+        "tenant_id": payload.tenant_id,
+        "campaign_id": payload.campaign_id,
+        "amount": payload.amount,
+        "donor_name": payload.donor_name,
+        "donor_phone": payload.donor_phone,
+        "donor_email": payload.donor_email,
+        "message": payload.message,
+        "method": payload.method,
+        "is_anonymous": payload.is_anonymous,
+        "status": "PENDING",
+    })
+    # Async sessions cannot lazy load, so pull the campaign in with the donation
+    donation = await fetch_donation_for_payment(db, donation.id)
 
     try:
         if payload.method == "MPESA":
             if donation.tenant_id is None:
                 raise HTTPException(status_code=400, detail="Tenant ID is required")
 
-            integrations = donation.tenant.mpesa_integrations
-            active_integration = next((integration for integration in integrations if integration.is_active), None)
-            if active_integration is None:
+            integration = await get_active_integration(db, donation.tenant_id)
+            if integration is None:
                 raise HTTPException(status_code=400, detail="No active MPESA integration found")
 
-            payment_result = await process_payment(donation, db)
+            payment_result = await process_payment(donation, db, integration)
 
             donation.status = "PENDING"
             donation.payment_reference = payment_result.get("reference")
-            db.commit()
+            await db.commit()
 
             return {
                 "donation_id": str(donation.id),
@@ -123,11 +127,58 @@ async def make_donation(payload: CreateDonation, db: Session = Depends(get_db)):
 
     except Exception as e:
         donation.status = "FAILED"
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=500, detail=f"Payment processing failed: {str(e)}")
 
 
-@router.get("/", response_model=list[DonationOut])
+@router.post("/checkout", status_code=202)
+async def checkout_donation(payload: CreateDonation, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Accept an M-PESA donation without waiting on Daraja.
+
+    The PENDING donation is stored and a payment.initiate message is queued, the payment worker sends the STK push.
+    Clients follow status_url until the donation leaves PENDING.
+    """
+    if payload.method != PaymentMethod.MPESA:
+        raise HTTPException(status_code=400, detail="Only MPESA donations can be checked out asynchronously")
+
+    campaign = await fetch_campaign_async(db, payload.campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    if campaign.end_date and campaign.end_date < datetime.now():
+        raise HTTPException(status_code=400, detail="This campaign has ended.")
+    if not await has_active_integration(db, payload.tenant_id):
+        raise HTTPException(status_code=400, detail="No active MPESA integration found")
+
+    donation = await create_donation(db, {
+        "tenant_id": payload.tenant_id,
+        "campaign_id": payload.campaign_id,
+        "amount": payload.amount,
+        "donor_name": payload.donor_name,
+        "donor_phone": payload.donor_phone,
+        "donor_email": payload.donor_email,
+        "message": payload.message,
+        "method": payload.method,
+        "is_anonymous": payload.is_anonymous,
+        "status": PaymentStatus.PENDING,
+    })
+
+    try:
+        await publish_payment(RoutingKeys.PAYMENT_INITIATE, {"donation_id": str(donation.id)})
+    except Exception as e:
+        logger.error(f"Failed to queue payment for donation {donation.id}: {e}")
+        donation.status = PaymentStatus.FAILED
+        await db.commit()
+        raise HTTPException(status_code=503, detail="Payment could not be queued, please try again")
+
+    return JSONResponse(status_code=202, content={
+        "donation_id": str(donation.id),
+        "payment_status": "queued",
+        "status_url": str(request.url_for("get_payment_status", donation_id=donation.id)),
+    })
+
+
+@router.get("/", response_model=DonationListOut)
 def list_donations(
         db: Session = Depends(get_db),
         active_only: bool = False,
@@ -135,28 +186,48 @@ def list_donations(
         campaign_id: UUID | None = None,
         start_date: datetime | None = None,
         end_date: datetime | None = None,
+        status: PaymentStatus | None = None,
+        cursor: str | None = Query(None, description="Cursor returned as next_cursor by the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Number of results per page"),
+        include_total: bool = Query(True, description="Also count all matching donations"),
 ):
-    query = db.query(Donation).options(joinedload(Donation.campaign))
-    if active_only:
-        now = datetime.now()
-        query = query.filter(Donation.donated_at >= now)
-    if tenant_id:
-        query = query.filter(Donation.tenant_id == tenant_id)
-    if campaign_id:
-        query = query.filter(Donation.campaign_id == campaign_id)
-    if start_date:
-        query = query.filter(Donation.donated_at >= start_date)
-    if end_date:
-        query = query.filter(Donation.donated_at <= end_date)
+    filters = build_donation_filters(active_only, tenant_id, campaign_id, start_date, end_date, status)
+    donations, next_cursor, total = fetch_donations(db, filters, cursor, limit, include_total)
 
-    donations = query.order_by(Donation.donated_at.desc()).all()
+    return {
+        "donations": donations,
+        "pagination": {"limit": limit, "next_cursor": next_cursor, "total": total},
+    }
 
-    return donations
+
+@router.get("/export")
+def export_donations(
+        export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+        active_only: bool = False,
+        campaign_id: UUID | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        status: PaymentStatus | None = None,
+        auth=Depends(require_tenant_admin),
+):
+    user, tenant = auth
+    # Always scoped to the caller's tenant, the export carries donor contact details
+    filters = build_donation_filters(active_only, tenant.id, campaign_id, start_date, end_date, status)
+    if export_format == ExportFormat.NDJSON:
+        body, media_type = export_donations_ndjson(filters), "application/x-ndjson"
+    else:
+        body, media_type = export_donations_csv(filters), "text/csv"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="donations.{export_format.value}"'},
+    )
 
 
 @router.post("/pay/{donation_id}")
-async def pay_donation(donation_id: UUID, db: Session = Depends(get_db)):
-    donation = db.query(Donation).filter(Donation.id == donation_id).first()
+async def pay_donation(donation_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    donation = await fetch_donation_for_payment(db, donation_id)
     if not donation:
         raise HTTPException(status_code=404, detail="Donation not found")
     if donation.status == "PAID":
@@ -167,16 +238,15 @@ async def pay_donation(donation_id: UUID, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Donation amount must be greater than 0")
     if donation.tenant_id is None:
         raise HTTPException(status_code=400, detail="Tenant ID is required")
-    integrations = donation.tenant.mpesa_integrations
-    active_integration = next((integration for integration in integrations if integration.is_active), None)
-    if active_integration is None:
+    integration = await get_active_integration(db, donation.tenant_id)
+    if integration is None:
         raise HTTPException(status_code=400, detail="No active MPESA integration found")
     try:
-        result = await process_payment(donation, db)
+        result = await process_payment(donation, db, integration)
         return {"status": "initiated", "payment_data": result, "donation_id": donation.id}
     except Exception as e:
         donation.status = "FAILED"
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=500, detail=f"Payment failed: {str(e)}")
 
 
@@ -191,13 +261,40 @@ def get_payment_status(donation_id: UUID, db: Session = Depends(get_db)):
     }
 
 
-@router.get("/campaigns/{campaign_id}", response_model=list[DonationOut])
-def list_campaign_donations(campaign_id: UUID, db: Session = Depends(get_db)):
+@router.get("/pay/{donation_id}/events")
+async def stream_payment_status(donation_id: UUID, request: Request):
+    """
+    Server-Sent Events alternative to polling /pay/{donation_id}/status.
+
+    Sends the current status straight away, then every change until the donation leaves PENDING.
+    """
+    if await read_donation_status(donation_id) is None:
+        raise HTTPException(status_code=404, detail="Donation not found")
+
+    return StreamingResponse(
+        stream_donation_status(request, donation_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/campaigns/{campaign_id}", response_model=DonationListOut)
+def list_campaign_donations(
+        campaign_id: UUID,
+        db: Session = Depends(get_db),
+        cursor: str | None = Query(None, description="Cursor returned as next_cursor by the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Number of results per page"),
+        include_total: bool = Query(True, description="Also count all matching donations"),
+):
     campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
 
-    donations = db.query(Donation) \
-        .filter(Donation.campaign_id == campaign_id).order_by(Donation.donated_at.desc()).all()
+    # Public donor wall, pending and failed donations are never listed here
+    filters = build_donation_filters(campaign_id=campaign_id, status=PaymentStatus.SUCCESS)
+    donations, next_cursor, total = fetch_donations(db, filters, cursor, limit, include_total)
 
-    return donations
+    return {
+        "donations": donations,
+        "pagination": {"limit": limit, "next_cursor": next_cursor, "total": total},
+    }
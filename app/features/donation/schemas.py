@@ -6,6 +6,8 @@ from uuid import UUID
 from decimal import Decimal
 from datetime import datetime
 
+from app.common.pagination import CursorPagination
+
 
 class PaymentMethod(str, Enum):
     MPESA = "MPESA"
@@ -66,3 +68,7 @@ class DonationOut(DonationBase):
             Decimal: lambda v: float(v)
         }
 
+
+class DonationListOut(BaseModel):
+    donations: list[DonationOut]
+    pagination: CursorPagination
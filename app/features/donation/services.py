@@ -0,0 +1,171 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Iterator
+from uuid import UUID
+
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.common.pagination import DEFAULT_PAGE_SIZE, decode_cursor, next_page
+from app.db.index import SessionLocal
+from app.features.campaign.models import Campaign
+from app.features.donation.models import Donation, PaymentStatus
+
+# Rows pulled per round trip from the server-side cursor while exporting
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    Donation.id,
+    Donation.tenant_id,
+    Donation.campaign_id,
+    Campaign.title.label("campaign_title"),
+    Donation.amount,
+    Donation.method,
+    Donation.status,
+    Donation.transaction_id,
+    Donation.checkout_request_id,
+    Donation.mpesa_receipt,
+    Donation.donor_name,
+    Donation.donor_email,
+    Donation.donor_phone,
+    Donation.is_anonymous,
+    Donation.message,
+    Donation.donated_at,
+)
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+# Create donation
+async def create_donation(db: AsyncSession, data) -> Donation:
+    donation = Donation(**data)
+    db.add(donation)
+    await db.commit()
+    await db.refresh(donation)
+    return donation
+
+
+# Get donation -> By ID, with the campaign the payment flow touches loaded up front
+async def fetch_donation_for_payment(db: AsyncSession, donation_id: UUID) -> Donation | None:
+    result = await db.execute(
+        select(Donation)
+        .where(Donation.id == donation_id)
+        .options(
+            selectinload(Donation.campaign),
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+# Get donation -> By M-PESA CheckoutRequestID
+async def fetch_donation_by_checkout_request_id(db: AsyncSession, checkout_request_id: str) -> Donation | None:
+    result = await db.execute(select(Donation).where(Donation.checkout_request_id == checkout_request_id))
+    return result.scalar_one_or_none()
+
+
+# Filters shared by the donation listing and the export
+def build_donation_filters(
+        active_only: bool = False,
+        tenant_id: UUID | None = None,
+        campaign_id: UUID | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        status: PaymentStatus | None = None,
+) -> list:
+    filters = []
+    if active_only:
+        filters.append(Donation.donated_at >= datetime.now())
+    if tenant_id:
+        filters.append(Donation.tenant_id == tenant_id)
+    if campaign_id:
+        filters.append(Donation.campaign_id == campaign_id)
+    if start_date:
+        filters.append(Donation.donated_at >= start_date)
+    if end_date:
+        filters.append(Donation.donated_at <= end_date)
+    if status:
+        filters.append(Donation.status == status)
+    return filters
+
+
+# List donations -> keyset paginated on (donated_at, id), newest first
+def fetch_donations(
+        db: Session,
+        filters: list,
+        cursor: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        include_total: bool = True,
+):
+    total = None
+    if include_total:
+        total = db.query(func.count(Donation.id)).filter(*filters).scalar()
+
+    query = db.query(Donation).options(joinedload(Donation.campaign)).filter(*filters)
+    if cursor:
+        donated_at, donation_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Donation.donated_at, Donation.id) < tuple_(donated_at, donation_id))
+
+    donations = query.order_by(Donation.donated_at.desc(), Donation.id.desc()).limit(limit + 1).all()
+    donations, next_cursor = next_page(donations, limit, "donated_at")
+    return donations, next_cursor, total
+
+
+def _export_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    return str(value)
+
+
+def iter_donation_rows(filters: list) -> Iterator[dict]:
+    """
+    Stream donations matching filters off a server-side cursor.
+
+    Opens its own session because the response body is produced after the request's
+    dependencies have been torn down. Only EXPORT_BATCH_SIZE rows are held in memory at a time.
+    """
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .join(Campaign, Campaign.id == Donation.campaign_id)
+        .where(*filters)
+        .order_by(Donation.donated_at.desc(), Donation.id.desc())
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    with SessionLocal() as db:
+        for row in db.execute(stmt):
+            yield {key: _export_value(value) for key, value in row._mapping.items()}
+
+
+def export_donations_csv(filters: list) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=[column.key for column in EXPORT_COLUMNS])
+    writer.writeheader()
+    for index, row in enumerate(iter_donation_rows(filters), start=1):
+        writer.writerow(row)
+        # Flush in chunks so we neither buffer the whole file nor send one tiny chunk per row
+        if index % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def export_donations_ndjson(filters: list) -> Iterator[str]:
+    lines = []
+    for row in iter_donation_rows(filters):
+        lines.append(json.dumps(row))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from uuid import UUID
+
+from fastapi import Request
+from sqlalchemy import select
+
+from app.common.redis import get_async_redis
+from app.config import settings
+from app.db.index import AsyncSessionLocal
+from app.features.donation.models import Donation, PaymentStatus
+from app.logger import logger
+
+CHANNEL_PATTERN = "donation:*:status"
+
+
+def status_channel(donation_id) -> str:
+    return f"donation:{donation_id}:status"
+
+
+def status_payload(donation_id, status, transaction_code) -> dict:
+    # Same shape as GET /donations/pay/{donation_id}/status
+    return {
+        "donation_id": str(donation_id),
+        "status": getattr(status, "value", status),
+        "transaction_code": transaction_code,
+    }
+
+
+async def publish_donation_status(donation: Donation) -> None:
+    """Announce a donation's new status to waiting clients. Call after the change is committed."""
+    redis = get_async_redis()
+    if not redis:
+        return
+    payload = status_payload(donation.id, donation.status, donation.transaction_id)
+    try:
+        await redis.publish(status_channel(donation.id), json.dumps(payload))
+    except Exception as e:
+        # Subscribers fall back to re-reading the row, a lost message only delays them
+        logger.warning(f"Failed to publish status for donation {donation.id}: {e}")
+
+
+async def read_donation_status(donation_id: UUID) -> Optional[dict]:
+    # Short-lived session so an open event stream never holds a pooled connection
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(Donation.status, Donation.transaction_id).where(Donation.id == donation_id)
+        )).one_or_none()
+    if row is None:
+        return None
+    return status_payload(donation_id, row.status, row.transaction_id)
+
+
+class DonationStatusBroker:
+    """
+    Fans Redis status messages out to the event streams of this process.
+
+    One pattern subscription is shared by every waiting client, so open streams cost an asyncio.Queue each
+    instead of a Redis connection each.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._listener: Optional[asyncio.Task] = None
+
+    def _ensure_listener(self) -> None:
+        redis = get_async_redis()
+        if redis and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.create_task(self._listen(redis))
+
+    async def _listen(self, redis) -> None:
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.psubscribe(CHANNEL_PATTERN)
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                payload = json.loads(message["data"])
+                for queue in list(self._subscribers.get(payload["donation_id"], ())):
+                    queue.put_nowait(payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The next subscriber restarts the listener, streams keep re-reading the row meanwhile
+            logger.warning(f"Donation status listener stopped: {e}")
+        finally:
+            await pubsub.aclose()
+
+    @asynccontextmanager
+    async def subscribe(self, donation_id: UUID) -> AsyncIterator[asyncio.Queue]:
+        key = str(donation_id)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[key].add(queue)
+        self._ensure_listener()
+        try:
+            yield queue
+        finally:
+            self._subscribers[key].discard(queue)
+            if not self._subscribers[key]:
+                del self._subscribers[key]
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+status_broker = DonationStatusBroker()
+
+
+def format_event(payload: dict) -> str:
+    return f"event: status\ndata: {json.dumps(payload)}\n\n"
+
+
+async def stream_donation_status(request: Request, donation_id: UUID) -> AsyncIterator[str]:
+    """
+    Server-Sent Events stream of a donation's status, ends once it leaves PENDING.
+
+    Updates are pushed through Redis pub/sub. Between pushes the row is re-read every heartbeat, which covers missed
+    messages, and every few seconds when Redis isn't configured. Streams close after PAYMENT_EVENTS_MAX_WAIT_SECONDS.
+    """
+    deadline = time.monotonic() + settings.PAYMENT_EVENTS_MAX_WAIT_SECONDS
+    recheck_every = settings.PAYMENT_EVENTS_HEARTBEAT_SECONDS if get_async_redis() \
+        else settings.PAYMENT_EVENTS_POLL_SECONDS
+
+    async with status_broker.subscribe(donation_id) as queue:
+        # Read after subscribing so an update committed in between still reaches us
+        event = await read_donation_status(donation_id)
+        if event is None:
+            return
+        yield format_event(event)
+
+        while event["status"] == PaymentStatus.PENDING.value and time.monotonic() < deadline:
+            try:
+                latest = await asyncio.wait_for(queue.get(), timeout=recheck_every)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                latest = await read_donation_status(donation_id)
+                if latest is None:
+                    return
+                if latest == event:
+                    yield ": keep-alive\n\n"
+                    continue
+            event = latest
+            yield format_event(event)
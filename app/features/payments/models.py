@@ -0,0 +1,27 @@
+import uuid
+from enum import Enum
+
+from sqlalchemy import Column, UUID, String, DateTime, func, UniqueConstraint
+
+from app.db.index import Base
+
+
+class WebhookProvider(str, Enum):
+    MPESA = "mpesa"
+    STRIPE = "stripe"
+
+
+class WebhookEvent(Base):
+    """Inbox of processed payment webhooks, one row per provider event."""
+    __tablename__ = "webhook_events"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    provider = Column(String(20), nullable=False)
+    # CheckoutRequestID for M-PESA, the event id (evt_...) for Stripe
+    event_id = Column(String(255), nullable=False)
+    event_type = Column(String(100), nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("provider", "event_id", name="uq_webhook_events_provider_event_id"),
+    )
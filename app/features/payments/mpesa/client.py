@@ -0,0 +1,123 @@
+import asyncio
+import importlib.util
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+from app.logger import logger
+
+# HTTP/2 needs the optional h2 package, fall back to pooled HTTP/1.1 keep-alive without it
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Daraja answers these when it is overloaded or briefly unavailable
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Raised before the request reached Daraja, so resending can't trigger a second STK prompt
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def get_url(environment):
+    if environment == "sandbox":
+        return "https://sandbox.safaricom.co.ke"
+    else:
+        return "https://api.safaricom.co.ke"
+
+
+class MpesaClient:
+    """
+    Long-lived Daraja client sharing one pooled httpx.AsyncClient across requests.
+
+    Connections are kept alive between calls so STK pushes skip the TCP+TLS handshake. OAuth calls are idempotent
+    and retried on transport errors and retryable status codes. STK pushes are only retried when the connection
+    could not be established, a push that reached Daraja is never resent since the donor would be prompted twice.
+    """
+
+    def __init__(
+            self,
+            timeout: float = settings.MPESA_HTTP_TIMEOUT,
+            connect_timeout: float = settings.MPESA_HTTP_CONNECT_TIMEOUT,
+            max_connections: int = settings.MPESA_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections: int = settings.MPESA_HTTP_MAX_KEEPALIVE,
+            retries: int = settings.MPESA_HTTP_RETRIES,
+            backoff: float = settings.MPESA_HTTP_RETRY_BACKOFF,
+    ):
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.retries = retries
+        self.backoff = backoff
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the running event loop rather than the one active at import time
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=HTTP2_AVAILABLE)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _send(self, method: str, url: str, retry_errors: tuple, retry_status: bool, **kwargs) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except retry_errors as e:
+                if last_attempt:
+                    raise
+                logger.warning(f"M-PESA {method} {url} failed ({e!r}), retrying")
+            else:
+                if not (retry_status and response.status_code in RETRYABLE_STATUS_CODES) or last_attempt:
+                    return response
+                logger.warning(f"M-PESA {method} {url} returned {response.status_code}, retrying")
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def fetch_access_token(self, consumer_key: str, consumer_secret: str, environment) -> tuple[str, int]:
+        """
+        Request a new OAuth token from Daraja.
+
+        Returns:
+            tuple[str, int]: The access token and its lifetime in seconds.
+        """
+        response = await self._send(
+            "GET",
+            f"{get_url(environment)}/oauth/v1/generate",
+            retry_errors=(httpx.TransportError,),
+            retry_status=True,
+            params={"grant_type": "client_credentials"},
+            auth=(consumer_key, consumer_secret),
+        )
+        if response.status_code != 200:
+            raise Exception("Failed to get access token")
+        data = response.json()
+        return data["access_token"], int(data.get("expires_in", 3599))
+
+    async def stk_push(self, token: str, environment, payload: dict) -> httpx.Response:
+        return await self._send(
+            "POST",
+            f"{get_url(environment)}/mpesa/stkpush/v1/processrequest",
+            retry_errors=CONNECT_ERRORS,
+            retry_status=False,
+            json=payload,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    async def stk_query(self, token: str, environment, payload: dict) -> httpx.Response:
+        # Status queries are read-only, so they are retried like OAuth calls
+        return await self._send(
+            "POST",
+            f"{get_url(environment)}/mpesa/stkpushquery/v1/query",
+            retry_errors=(httpx.TransportError,),
+            retry_status=True,
+            json=payload,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+
+mpesa_client = MpesaClient()
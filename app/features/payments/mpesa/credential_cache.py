@@ -0,0 +1,53 @@
+import time
+
+from app.common.security import decrypt_secret
+from app.config import settings
+from app.features.payments.mpesa.models import MPESAIntegration
+from app.features.payments.mpesa.schemas import MPESAIntegrationOut
+
+
+def decrypt_integration(integration: MPESAIntegration) -> MPESAIntegrationOut:
+    return MPESAIntegrationOut(
+        consumer_key=decrypt_secret(integration.consumer_key),
+        consumer_secret=decrypt_secret(integration.consumer_secret),
+        shortcode=integration.shortcode,
+        passkey=decrypt_secret(integration.passkey),
+        callback_url=integration.callback_url,
+        environment=integration.environment,
+        is_active=integration.is_active,
+        id=integration.id,
+        tenant_id=integration.tenant_id,
+        created_at=integration.created_at,
+        updated_at=integration.updated_at,
+    )
+
+
+class IntegrationCredentialCache:
+    """
+    Decrypted M-PESA integration credentials, kept in process memory.
+
+    Entries are keyed by integration id and remember the row's updated_at, so an edit made by any process is picked up
+    on the next read of the row. Entries also expire after MPESA_CREDENTIAL_CACHE_TTL_SECONDS to bound how long
+    plaintext secrets stay in memory.
+    """
+
+    def __init__(self, ttl: int = settings.MPESA_CREDENTIAL_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries: dict = {}
+
+    def get(self, integration: MPESAIntegration) -> MPESAIntegrationOut:
+        entry = self._entries.get(integration.id)
+        if entry:
+            updated_at, expires_at, credentials = entry
+            if updated_at == integration.updated_at and expires_at > time.monotonic():
+                return credentials
+
+        credentials = decrypt_integration(integration)
+        self._entries[integration.id] = (integration.updated_at, time.monotonic() + self.ttl, credentials)
+        return credentials
+
+    def invalidate(self, integration_id) -> None:
+        self._entries.pop(integration_id, None)
+
+
+credential_cache = IntegrationCredentialCache()
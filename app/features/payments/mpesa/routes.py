@@ -4,20 +4,28 @@ from datetime import datetime, timezone
 from decimal import Decimal
 from uuid import uuid4
 
-import httpx
 from fastapi import APIRouter, Request, HTTPException, Depends
 from pydantic import HttpUrl
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.common.deps import require_tenant_admin
-from app.common.security import encrypt_secret, decrypt_secret
-from app.db.index import get_db
-from app.features.donation.models import Donation, PaymentStatus
-from app.features.campaign.models import Campaign
+from app.common.security import encrypt_secret
+from app.db.index import get_db, get_async_db
+from app.features.donation.models import PaymentStatus
+from app.features.campaign.counters import apply_successful_donation, buffer_donation
+from app.features.donation.services import fetch_donation_by_checkout_request_id
+from app.features.donation.status_events import publish_donation_status
 from app.features.payments.mpesa.models import MPESAIntegration
 from app.features.payments.mpesa.schemas import MPESAIntegrationCreate, MPESAIntegrationOut, \
     MpesaIntegrationUpdate, MpesaIntegrationTestCreate
-from app.features.payments.mpesa.services import get_access_token, get_url
+from app.features.payments.models import WebhookProvider
+from app.features.payments.mpesa.client import mpesa_client
+from app.features.payments.mpesa.credential_cache import credential_cache
+from app.features.payments.mpesa.services import get_access_token
+from app.features.payments.mpesa.token_cache import token_cache
+from app.features.payments.webhooks import is_known_event, claim_event, remember_event
+from app.logger import logger
 
 router = APIRouter()
 
@@ -110,6 +118,9 @@ def update_mpesa_payment(
 
         db.commit()
         db.refresh(payment)
+        # Credentials or environment may have changed, don't keep serving tokens minted for the old ones
+        token_cache.invalidate(payment.id)
+        credential_cache.invalidate(payment.id)
         return payment
     except Exception as e:
         db.rollback()
@@ -132,13 +143,12 @@ async def test_mpesa_integration(
 
         if not integration:
             raise HTTPException(status_code=404, detail="No M-PESA integration found for this tenant")
-        url = get_url(integration.environment)
-        key = decrypt_secret(str(integration.consumer_key))
-        secret = decrypt_secret(str(integration.consumer_secret))
-        passKey = decrypt_secret(str(integration.passkey))
-        token = get_access_token(key, secret, url)
+        credentials = credential_cache.get(integration)
+        token = await get_access_token(
+            integration.id, integration.environment, credentials.consumer_key, credentials.consumer_secret
+        )
         timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        password = base64.b64encode(f"{integration.shortcode}{passKey}{timestamp}".encode()).decode()
+        password = base64.b64encode(f"{integration.shortcode}{credentials.passkey}{timestamp}".encode()).decode()
 
         payload = {
             "BusinessShortCode": integration.shortcode,
@@ -154,21 +164,14 @@ async def test_mpesa_integration(
             "TransactionDesc": "Payment Integration Test"
         }
 
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f"{url}/mpesa/stkpush/v1/processrequest", json=payload,
-                                         headers=headers)
-            resp_json = response.json()
+        response = await mpesa_client.stk_push(token, integration.environment, payload)
+        resp_json = response.json()
 
-            if resp_json.get("ResponseCode") == "0":
-                integration.is_verified = True
-                db.commit()
-                return {"message": "M-PESA Integration test successful", "response": resp_json}
-            raise HTTPException(status_code=400, detail=resp_json.get("errorMessage"))
+        if resp_json.get("ResponseCode") == "0":
+            integration.is_verified = True
+            db.commit()
+            return {"message": "M-PESA Integration test successful", "response": resp_json}
+        raise HTTPException(status_code=400, detail=resp_json.get("errorMessage"))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error: {str(e)}")
 
@@ -177,7 +180,7 @@ async def test_mpesa_integration(
 async def mpesa_callback(
         integration_id: str,
         request: Request,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     body_bytes = await request.body()
     body_str = body_bytes.decode("utf-8")
@@ -189,7 +192,25 @@ async def mpesa_callback(
         result_code = stk_callback["ResultCode"]
         result_desc = stk_callback["ResultDesc"]
 
+        # Safaricom redelivers callbacks, each CheckoutRequestID is applied once
+        if await is_known_event(WebhookProvider.MPESA, checkout_request_id):
+            return {"message": "Callback received"}
+
+        # Single indexed lookup, the CheckoutRequestID is never overwritten
+        donation = await fetch_donation_by_checkout_request_id(db, checkout_request_id)
+        if donation is None:
+            # The payment worker may not have committed the CheckoutRequestID yet. Nothing is claimed and the
+            # non-2xx makes Safaricom redeliver, reconciliation settles it if the callback never lands.
+            logger.warning(f"M-PESA callback for unknown CheckoutRequestID {checkout_request_id}, not claimed")
+            raise HTTPException(status_code=404, detail="Donation not found")
+
+        # Claimed in the same transaction as the status change below
+        if not await claim_event(db, WebhookProvider.MPESA, checkout_request_id, f"stk:{result_code}"):
+            await remember_event(WebhookProvider.MPESA, checkout_request_id)
+            return {"message": "Callback received"}
+
         amount = None
+        delta = None
         mpesa_receipt_number = None
         phone_number = None
 
@@ -203,28 +224,36 @@ async def mpesa_callback(
                 elif item['Name'] == 'PhoneNumber':
                     phone_number = item['Value']
 
-            donation = db.query(Donation).filter(Donation.transaction_id == checkout_request_id).first()
-            if donation:
+            if donation.status == PaymentStatus.PENDING:
                 donation.status = PaymentStatus.SUCCESS
-                donation.donor_phone = phone_number
+                # Daraja sends the number as an int, the column is varchar
+                donation.donor_phone = str(phone_number) if phone_number is not None else donation.donor_phone
+                donation.mpesa_receipt = mpesa_receipt_number
                 donation.transaction_id = mpesa_receipt_number
                 donation.callback_data = body
                 donation.donated_at = datetime.now(timezone.utc)
                 db.add(donation)
 
-                campaign = db.query(Campaign).filter(Campaign.id == donation.campaign_id).first()
-                campaign.current_amount += Decimal(amount)
-                db.commit()
-        else:
-            donation = db.query(Donation).filter(Donation.transaction_id == checkout_request_id).first()
-            if donation:
-                donation.status = PaymentStatus.FAILED
-                donation.callback_data = body_str
-                db.commit()
+                delta = await apply_successful_donation(db, donation, Decimal(amount))
+        elif donation.status == PaymentStatus.PENDING:
+            donation.status = PaymentStatus.FAILED
+            donation.callback_data = body
+
+        # The inbox row commits together with the donation update
+        await db.commit()
+        await buffer_donation(delta)
+        await remember_event(WebhookProvider.MPESA, checkout_request_id)
+        await publish_donation_status(donation)
 
-        return {"message": "Callback received"}, 200
+        return {"message": "Callback received"}
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        return {"error": str(e)}, 500
+        await db.rollback()
+        logger.error(f"M-PESA callback for integration {integration_id} failed: {e}")
+        # A real 5xx so Safaricom redelivers the callback
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
@@ -1,38 +1,46 @@
 import base64
 from datetime import datetime
 
-import httpx
-import requests
-from requests.auth import HTTPBasicAuth
-from sqlalchemy.orm import Session
+from sqlalchemy import select, exists
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import HTTPException
-from app.common.security import decrypt_secret
 from app.features.donation.models import Donation, PaymentMethod
+from app.features.payments.mpesa.client import mpesa_client
+from app.features.payments.mpesa.credential_cache import credential_cache
+from app.features.payments.mpesa.models import MPESAIntegration
 from app.features.payments.mpesa.schemas import MPESAIntegrationOut
+from app.features.payments.mpesa.token_cache import token_cache
 
 
-def get_url(environment):
-    if environment == "sandbox":
-        return "https://sandbox.safaricom.co.ke"
-    else:
-        return "https://api.safaricom.co.ke"
+# Cheap check for the checkout request path, secrets are only decrypted by the payment worker
+async def has_active_integration(db: AsyncSession, tenant_id) -> bool:
+    result = await db.execute(select(exists().where(
+        MPESAIntegration.tenant_id == tenant_id,
+        MPESAIntegration.is_active.is_(True),
+    )))
+    return result.scalar()
 
 
-def get_access_token(consumer_key, consumer_secret, base_url):
-    url = f"{base_url}/oauth/v1/generate?grant_type=client_credentials"
-    r = requests.get(url, auth=HTTPBasicAuth(consumer_key, consumer_secret))
-    if r.status_code != 200:
-        raise Exception("Failed to get access token")
-    data = r.json()
-    return data['access_token']
+# Get access token -> cached per integration, Daraja is only called when the cached token is about to expire
+async def get_access_token(integration_id, environment, consumer_key, consumer_secret):
+    return await token_cache.get_token(
+        integration_id, environment,
+        lambda: mpesa_client.fetch_access_token(consumer_key, consumer_secret, environment)
+    )
 
 
-async def initiate_stk_push(integration, donation: Donation, db: Session):
-    url = get_url(integration.environment)
-    token = get_access_token(integration.consumer_key, integration.consumer_secret, url)
+def stk_password(shortcode, passkey) -> tuple[str, str]:
     timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-    password = base64.b64encode(f"{integration.shortcode}{integration.passkey}{timestamp}".encode()).decode()
+    password = base64.b64encode(f"{shortcode}{passkey}{timestamp}".encode()).decode()
+    return password, timestamp
+
+
+async def initiate_stk_push(integration, donation: Donation, db: AsyncSession):
+    token = await get_access_token(
+        integration.id, integration.environment, integration.consumer_key, integration.consumer_secret
+    )
+    password, timestamp = stk_password(integration.shortcode, integration.passkey)
 
     payload = {
         "BusinessShortCode": integration.shortcode,
@@ -48,43 +56,50 @@ async def initiate_stk_push(integration, donation: Donation, db: Session):
         "TransactionDesc": donation.message or "Donation"
     }
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{url}/mpesa/stkpush/v1/processrequest", json=payload,
-                                     headers=headers)
-        resp_json = response.json()
-        donation.transaction_id = resp_json.get("CheckoutRequestID")
-        donation.callback_data = resp_json
-        db.commit()
-        return resp_json
-
-
-
-async def process_payment(donation: Donation, db: Session):
+    response = await mpesa_client.stk_push(token, integration.environment, payload)
+    if response.status_code == 401:
+        # Token was revoked or expired early, make the next push fetch a fresh one
+        token_cache.invalidate(integration.id, integration.environment)
+    resp_json = response.json()
+    donation.checkout_request_id = resp_json.get("CheckoutRequestID")
+    donation.callback_data = resp_json
+    await db.commit()
+    return resp_json
+
+
+# Get the tenant's active integration with decrypted credentials -> one query, decrypts only on a cache miss
+async def get_active_integration(db: AsyncSession, tenant_id) -> MPESAIntegrationOut | None:
+    result = await db.execute(
+        select(MPESAIntegration)
+        .where(MPESAIntegration.tenant_id == tenant_id, MPESAIntegration.is_active.is_(True))
+        .limit(1)
+    )
+    integration = result.scalar_one_or_none()
+    return credential_cache.get(integration) if integration else None
+
+
+async def process_payment(donation: Donation, db: AsyncSession, integration: MPESAIntegrationOut | None = None):
     if donation.method == PaymentMethod.MPESA:
-        integrations = donation.tenant.mpesa_integrations
-        active_integration = next((integration for integration in integrations if integration.is_active), None)
-        if active_integration is None:
+        integration = integration or await get_active_integration(db, donation.tenant_id)
+        if integration is None:
             raise HTTPException(status_code=400, detail="No active M-PESA integration found")
-
-        integration = MPESAIntegrationOut(
-            consumer_key=decrypt_secret(active_integration.consumer_key),
-            consumer_secret=decrypt_secret(active_integration.consumer_secret),
-            shortcode=active_integration.shortcode,
-            passkey=decrypt_secret(active_integration.passkey),
-            callback_url=active_integration.callback_url,
-            environment=active_integration.environment,
-            is_active=active_integration.is_active,
-            id=active_integration.id,
-            tenant_id=active_integration.tenant_id,
-            created_at=active_integration.created_at,
-            updated_at=active_integration.updated_at,
-        )
-
         return await initiate_stk_push(integration, donation, db)
     return None
 
+
+# Ask Daraja what became of an STK push whose callback never arrived
+async def query_stk_status(integration, checkout_request_id: str) -> dict:
+    token = await get_access_token(
+        integration.id, integration.environment, integration.consumer_key, integration.consumer_secret
+    )
+    password, timestamp = stk_password(integration.shortcode, integration.passkey)
+    payload = {
+        "BusinessShortCode": integration.shortcode,
+        "Password": password,
+        "Timestamp": timestamp,
+        "CheckoutRequestID": checkout_request_id,
+    }
+    response = await mpesa_client.stk_query(token, integration.environment, payload)
+    if response.status_code == 401:
+        token_cache.invalidate(integration.id, integration.environment)
+    return response.json()
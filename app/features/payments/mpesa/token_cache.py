@@ -0,0 +1,118 @@
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Optional
+
+from app.common.redis import get_redis
+from app.config import settings
+from app.features.payments.mpesa.schemas import EnvironmentType
+from app.logger import logger
+
+# (access_token, expires_in seconds) as returned by Daraja's /oauth/v1/generate
+TokenFetcher = Callable[[], Awaitable[tuple[str, int]]]
+
+
+class MpesaTokenCache:
+    """
+    Daraja OAuth tokens cached per (integration id, environment).
+
+    Tokens are treated as expired MPESA_TOKEN_REFRESH_MARGIN seconds before Daraja's expires_in so a request never
+    goes out with a token that lapses in flight. Refreshes are single-flight: concurrent callers for the same key
+    wait on one lock and reuse the token fetched by whoever got there first. When Redis is configured the token is
+    shared across workers too, the in-process copy still serves the hot path.
+    """
+
+    def __init__(self, refresh_margin: int = settings.MPESA_TOKEN_REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self._tokens: dict[tuple[str, str], tuple[str, float]] = {}
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    @staticmethod
+    def _key(integration_id, environment) -> tuple[str, str]:
+        # environment may arrive as the EnvironmentType enum or as its plain value
+        return str(integration_id), getattr(environment, "value", environment)
+
+    @staticmethod
+    def _redis_key(key: tuple[str, str]) -> str:
+        return f"mpesa:token:{key[0]}:{key[1]}"
+
+    def _get_fresh(self, key: tuple[str, str]) -> Optional[str]:
+        cached = self._tokens.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        return None
+
+    def _get_shared(self, key: tuple[str, str]) -> Optional[str]:
+        redis = get_redis()
+        if not redis:
+            return None
+        try:
+            cached = redis.get(self._redis_key(key))
+        except Exception as e:
+            logger.warning(f"M-PESA token cache read failed: {e}")
+            return None
+        if not cached:
+            return None
+        data = json.loads(cached)
+        remaining = data["expires_at"] - time.time() - self.refresh_margin
+        if remaining <= 0:
+            return None
+        self._tokens[key] = (data["access_token"], time.monotonic() + remaining)
+        return data["access_token"]
+
+    def _store(self, key: tuple[str, str], access_token: str, expires_in: int) -> None:
+        usable_for = max(expires_in - self.refresh_margin, 0)
+        self._tokens[key] = (access_token, time.monotonic() + usable_for)
+
+        redis = get_redis()
+        if not redis or usable_for <= 0:
+            return
+        try:
+            value = json.dumps({"access_token": access_token, "expires_at": time.time() + expires_in})
+            redis.set(self._redis_key(key), value, ex=usable_for)
+        except Exception as e:
+            logger.warning(f"M-PESA token cache write failed: {e}")
+
+    async def get_token(self, integration_id, environment, fetch: TokenFetcher) -> str:
+        """
+        Return a valid access token for the integration, calling fetch only when no cached token is usable.
+
+        Args:
+            integration_id: ID of the tenant's M-PESA integration.
+            environment (EnvironmentType): Tokens are not shared between sandbox and production.
+            fetch (TokenFetcher): Coroutine factory returning (access_token, expires_in).
+
+        Returns:
+            str: Bearer token.
+        """
+        key = self._key(integration_id, environment)
+        token = self._get_fresh(key)
+        if token:
+            return token
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another caller may have refreshed while we were waiting on the lock
+            token = self._get_fresh(key) or self._get_shared(key)
+            if token:
+                return token
+            access_token, expires_in = await fetch()
+            self._store(key, access_token, expires_in)
+            return access_token
+
+    def invalidate(self, integration_id, environment=None) -> None:
+        """Drop cached tokens for an integration, e.g. after its credentials change or Daraja rejects a token."""
+        environments = [environment] if environment else list(EnvironmentType)
+        redis = get_redis()
+        for env in environments:
+            key = self._key(integration_id, env)
+            self._tokens.pop(key, None)
+            if not redis:
+                continue
+            try:
+                redis.delete(self._redis_key(key))
+            except Exception as e:
+                logger.warning(f"M-PESA token cache invalidate failed: {e}")
+
+
+token_cache = MpesaTokenCache()
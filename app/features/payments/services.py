@@ -1,8 +1,11 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.features.donation.models import Donation
+from app.features.payments.mpesa.schemas import MPESAIntegrationOut
 from app.features.payments.mpesa.services import process_payment as process_mpesa_payment
 
 
-async def process_payment(donation: Donation, db):
-    return await process_mpesa_payment(donation, db)
+async def process_payment(donation: Donation, db: AsyncSession, integration: MPESAIntegrationOut | None = None):
+    return await process_mpesa_payment(donation, db, integration)
 
 
@@ -1,13 +1,22 @@
 import stripe
-from datetime import datetime
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import UUID
+
 from fastapi import APIRouter, Query, HTTPException, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.db.index import get_db
+from app.db.index import get_db, get_async_db
 from app.features.campaign.models import Campaign
-from app.features.donation.models import Donation
+from app.features.campaign.counters import apply_successful_donation, buffer_donation
+from app.features.campaign.services import fetch_campaign_async
+from app.features.donation.models import Donation, PaymentMethod, PaymentStatus
+from app.features.donation.status_events import publish_donation_status
+from app.features.payments.models import WebhookProvider
 from app.features.payments.stripe.schemas import CheckoutRequest
+from app.features.payments.webhooks import is_known_event, claim_event, remember_event
 
 router = APIRouter()
 stripe.api_key = settings.stripe_secret_key
@@ -66,7 +75,7 @@ def create_checkout_session(data: CheckoutRequest, db: Session = Depends(get_db)
 
 
 @router.post("/webhook")
-async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
+async def stripe_webhook(request: Request, db: AsyncSession = Depends(get_async_db)):
     payload = await request.body()
     sig_header = request.headers.get('stripe-signature')
 
@@ -80,6 +89,13 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
     if event["type"] == "checkout.session.completed":
+        # Stripe retries until it sees a 2xx, each event id is applied once
+        if await is_known_event(WebhookProvider.STRIPE, event["id"]):
+            return {"status": "ok"}
+        if not await claim_event(db, WebhookProvider.STRIPE, event["id"], event["type"]):
+            await remember_event(WebhookProvider.STRIPE, event["id"])
+            return {"status": "ok"}
+
         session1 = event["data"]["object"]
 
         metadata = session1.get("metadata", {})
@@ -93,20 +109,29 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
         if not campaign_id:
             raise HTTPException(status_code=400, detail="Missing campaign_id in metadata")
 
-        campaign = db.query(Campaign).filter(Campaign.id == metadata["campaign_id"]).first()
+        delta = None
+        campaign = await fetch_campaign_async(db, UUID(metadata["campaign_id"]))
         if campaign:
-            campaign.current_amount += amount_total / 100
-            db.add(campaign)
             donation = Donation(
-                amount=amount_total / 100,
+                tenant_id=campaign.tenant_id,
+                amount=Decimal(amount_total) / 100,
                 donor_name=donor_name or "Anonymous",
                 donor_email=donor_email or None,
                 message=message,
                 campaign_id=campaign.id,
-                donated_at=datetime.now()
+                method=PaymentMethod.CARD,
+                status=PaymentStatus.SUCCESS,
+                donated_at=datetime.now(timezone.utc)
             )
             db.add(donation)
-            db.commit()
+            await db.flush()
+            delta = await apply_successful_donation(db, donation, donation.amount)
+        # The inbox row commits together with the donation
+        await db.commit()
+        await buffer_donation(delta)
+        await remember_event(WebhookProvider.STRIPE, event["id"])
+        if campaign:
+            await publish_donation_status(donation)
     return {"status": "ok"}
 
 
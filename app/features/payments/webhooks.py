@@ -0,0 +1,57 @@
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.redis import get_async_redis
+from app.features.payments.models import WebhookEvent, WebhookProvider
+from app.logger import logger
+
+# Longer than either provider keeps retrying (Stripe gives up after three days)
+SEEN_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def _seen_key(provider: WebhookProvider, event_id: str) -> str:
+    return f"webhook:seen:{provider.value}:{event_id}"
+
+
+async def is_known_event(provider: WebhookProvider, event_id: str) -> bool:
+    """
+    Fast path for redelivered webhooks, answered from Redis without touching the database.
+
+    Only events whose processing has committed are recorded, so a False here just means "ask the inbox".
+    """
+    redis = get_async_redis()
+    if not redis:
+        return False
+    try:
+        return bool(await redis.exists(_seen_key(provider, event_id)))
+    except Exception as e:
+        logger.warning(f"Webhook dedup lookup failed: {e}")
+        return False
+
+
+async def claim_event(db: AsyncSession, provider: WebhookProvider, event_id: str, event_type: str | None = None) -> bool:
+    """
+    Record the event in the webhook inbox, returns False if it was already processed.
+
+    Must run in the same transaction as the event's side effects: the unique (provider, event_id) constraint makes a
+    concurrent delivery wait for this transaction and then skip, and a rollback releases the claim so the provider's
+    retry can process the event again. Does not commit.
+    """
+    stmt = (
+        insert(WebhookEvent)
+        .values(provider=provider.value, event_id=event_id, event_type=event_type)
+        .on_conflict_do_nothing(constraint="uq_webhook_events_provider_event_id")
+        .returning(WebhookEvent.id)
+    )
+    return (await db.execute(stmt)).scalar_one_or_none() is not None
+
+
+async def remember_event(provider: WebhookProvider, event_id: str) -> None:
+    """Add a committed event to the Redis fast path."""
+    redis = get_async_redis()
+    if not redis:
+        return
+    try:
+        await redis.set(_seen_key(provider, event_id), 1, ex=SEEN_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Webhook dedup write failed: {e}")
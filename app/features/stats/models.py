@@ -0,0 +1,48 @@
+from sqlalchemy import UUID, Column, Integer, Numeric, DateTime, Date, ForeignKey, Index, func
+
+from app.db.index import Base
+
+
+class TenantStats(Base):
+    """Per-tenant rollup, kept current by the payment callbacks and campaign writes."""
+    __tablename__ = "tenant_stats"
+
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True)
+    total_campaigns = Column(Integer, nullable=False, default=0, server_default="0")
+    active_campaigns = Column(Integer, nullable=False, default=0, server_default="0")
+    total_goal_amount = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    # SUM(campaigns.current_amount)
+    total_raised = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    success_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Distinct donor emails with at least one successful donation
+    donor_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_donation_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class CampaignStats(Base):
+    """Per-campaign rollup of successful donations."""
+    __tablename__ = "campaign_stats"
+
+    campaign_id = Column(UUID(as_uuid=True), ForeignKey("campaigns.id", ondelete="CASCADE"), primary_key=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, index=True)
+    total_amount = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    success_count = Column(Integer, nullable=False, default=0, server_default="0")
+    donor_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_donation_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class DonationDailyStats(Base):
+    """Successful donations per campaign per UTC day, backs the time series charts."""
+    __tablename__ = "donation_daily_stats"
+
+    campaign_id = Column(UUID(as_uuid=True), ForeignKey("campaigns.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
+    donation_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_amount = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_donation_daily_stats_tenant_day", "tenant_id", "day"),
+    )
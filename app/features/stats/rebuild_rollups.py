@@ -0,0 +1,30 @@
+"""
+Rebuild tenant_stats, campaign_stats and donation_daily_stats from the live tables.
+
+    python -m app.features.stats.rebuild_rollups
+    python -m app.features.stats.rebuild_rollups --tenant-id <uuid>
+"""
+import argparse
+from uuid import UUID
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.db.index import SessionLocal
+from app.features.stats.rollups import rebuild_rollups
+from app.logger import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenant-id", type=UUID, help="Only rebuild this tenant")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        rebuild_rollups(db, args.tenant_id)
+    logger.info(f"Rebuilt donation rollups for {args.tenant_id or 'all tenants'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import select, func, exists, and_, literal, delete, cast, Date
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.features.campaign.models import Campaign, CampaignStatus
+from app.features.donation.models import Donation, PaymentStatus
+from app.features.stats.models import TenantStats, CampaignStats, DonationDailyStats
+from app.features.tenant.models import Tenant
+
+
+def _is_new_donor_query(donation: Donation):
+    # Has this email already given successfully - to this campaign, and to this tenant at all?
+    seen_by_campaign = exists().where(
+        Donation.campaign_id == donation.campaign_id,
+        Donation.donor_email == donation.donor_email,
+        Donation.status == PaymentStatus.SUCCESS,
+        Donation.id != donation.id,
+    )
+    seen_by_tenant = exists().where(
+        Donation.tenant_id == donation.tenant_id,
+        Donation.donor_email == donation.donor_email,
+        Donation.status == PaymentStatus.SUCCESS,
+        Donation.id != donation.id,
+    )
+    return select(~seen_by_campaign, ~seen_by_tenant)
+
+
+@dataclass
+class DonationDelta:
+    """One successful donation's contribution to campaigns.current_amount and the rollups."""
+    campaign_id: UUID
+    tenant_id: UUID
+    amount: Decimal
+    new_campaign_donor: bool
+    new_tenant_donor: bool
+    donated_at: datetime
+
+
+def campaign_stats_upsert():
+    stmt = insert(CampaignStats)
+    return stmt.on_conflict_do_update(
+        index_elements=[CampaignStats.campaign_id],
+        set_={
+            "total_amount": CampaignStats.total_amount + stmt.excluded.total_amount,
+            "success_count": CampaignStats.success_count + stmt.excluded.success_count,
+            "donor_count": CampaignStats.donor_count + stmt.excluded.donor_count,
+            "last_donation_at": func.greatest(CampaignStats.last_donation_at, stmt.excluded.last_donation_at),
+            "updated_at": func.now(),
+        },
+    )
+
+
+def tenant_stats_upsert():
+    stmt = insert(TenantStats)
+    return stmt.on_conflict_do_update(
+        index_elements=[TenantStats.tenant_id],
+        set_={
+            "total_raised": TenantStats.total_raised + stmt.excluded.total_raised,
+            "success_count": TenantStats.success_count + stmt.excluded.success_count,
+            "donor_count": TenantStats.donor_count + stmt.excluded.donor_count,
+            "last_donation_at": func.greatest(TenantStats.last_donation_at, stmt.excluded.last_donation_at),
+            "updated_at": func.now(),
+        },
+    )
+
+
+def daily_stats_upsert():
+    stmt = insert(DonationDailyStats)
+    return stmt.on_conflict_do_update(
+        index_elements=[DonationDailyStats.campaign_id, DonationDailyStats.day],
+        set_={
+            "donation_count": DonationDailyStats.donation_count + stmt.excluded.donation_count,
+            "total_amount": DonationDailyStats.total_amount + stmt.excluded.total_amount,
+        },
+    )
+
+
+async def apply_rollup_increments(db: AsyncSession, campaign_rows: list[dict], tenant_rows: list[dict],
+                                  daily_rows: list[dict]) -> None:
+    # Each list goes out as one executemany, whether it holds one donation or a whole flush window
+    if campaign_rows:
+        await db.execute(campaign_stats_upsert(), campaign_rows)
+    if tenant_rows:
+        await db.execute(tenant_stats_upsert(), tenant_rows)
+    if daily_rows:
+        await db.execute(daily_stats_upsert(), daily_rows)
+
+
+async def donation_delta(db: AsyncSession, donation: Donation, amount: Decimal) -> DonationDelta:
+    new_campaign_donor = new_tenant_donor = False
+    if donation.donor_email:
+        new_campaign_donor, new_tenant_donor = (await db.execute(_is_new_donor_query(donation))).one()
+    return DonationDelta(
+        campaign_id=donation.campaign_id,
+        tenant_id=donation.tenant_id,
+        amount=amount,
+        new_campaign_donor=bool(new_campaign_donor),
+        new_tenant_donor=bool(new_tenant_donor),
+        donated_at=donation.donated_at or datetime.now(timezone.utc),
+    )
+
+
+async def record_successful_donation(db: AsyncSession, donation: Donation, amount: Decimal) -> None:
+    """
+    Apply one successful donation to campaign_stats, tenant_stats and donation_daily_stats.
+
+    Must run in the same transaction that marks the donation SUCCESS so the rollups commit (or roll back)
+    together with it. Does not commit.
+    """
+    delta = await donation_delta(db, donation, amount)
+    await apply_rollup_increments(
+        db,
+        [{
+            "campaign_id": delta.campaign_id,
+            "tenant_id": delta.tenant_id,
+            "total_amount": delta.amount,
+            "success_count": 1,
+            "donor_count": int(delta.new_campaign_donor),
+            "last_donation_at": delta.donated_at,
+        }],
+        [{
+            "tenant_id": delta.tenant_id,
+            "total_raised": delta.amount,
+            "success_count": 1,
+            "donor_count": int(delta.new_tenant_donor),
+            "last_donation_at": delta.donated_at,
+        }],
+        [{
+            "campaign_id": delta.campaign_id,
+            "tenant_id": delta.tenant_id,
+            "day": delta.donated_at.astimezone(timezone.utc).date(),
+            "donation_count": 1,
+            "total_amount": delta.amount,
+        }],
+    )
+
+
+def refresh_tenant_campaign_totals(db: Session, tenant_id: UUID) -> None:
+    """
+    Recount one tenant's campaign totals after a campaign is created, updated or deleted.
+
+    Only touches the campaign-derived columns, donation counters are left alone. Does not commit.
+    """
+    totals = select(
+        literal(tenant_id).label("tenant_id"),
+        func.count(Campaign.id),
+        func.count(Campaign.id).filter(Campaign.status == CampaignStatus.active),
+        func.coalesce(func.sum(Campaign.goal_amount), 0),
+        func.coalesce(func.sum(Campaign.current_amount), 0),
+    ).where(Campaign.tenant_id == tenant_id)
+
+    columns = ["tenant_id", "total_campaigns", "active_campaigns", "total_goal_amount", "total_raised"]
+    stmt = insert(TenantStats).from_select(columns, totals)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[TenantStats.tenant_id],
+        set_={column: stmt.excluded[column] for column in columns[1:]} | {"updated_at": func.now()},
+    ))
+
+
+def rebuild_rollups(db: Session, tenant_id: UUID | None = None) -> None:
+    """
+    Recompute campaign_stats, tenant_stats and donation_daily_stats from the live tables, for backfills
+    and drift repair.
+
+    Args:
+        db (Session): Database session, committed on success.
+        tenant_id (UUID, optional): Only rebuild this tenant. Defaults to every tenant.
+    """
+    campaign_rows = (
+        select(
+            Campaign.id,
+            Campaign.tenant_id,
+            func.coalesce(func.sum(Donation.amount), 0),
+            func.count(Donation.id),
+            func.count(func.distinct(Donation.donor_email)),
+            func.max(Donation.donated_at),
+        )
+        .select_from(Campaign)
+        .outerjoin(Donation, and_(Donation.campaign_id == Campaign.id, Donation.status == PaymentStatus.SUCCESS))
+        .group_by(Campaign.id)
+    )
+    if tenant_id:
+        campaign_rows = campaign_rows.where(Campaign.tenant_id == tenant_id)
+
+    columns = ["campaign_id", "tenant_id", "total_amount", "success_count", "donor_count", "last_donation_at"]
+    stmt = insert(CampaignStats).from_select(columns, campaign_rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[CampaignStats.campaign_id],
+        set_={column: stmt.excluded[column] for column in columns[1:]} | {"updated_at": func.now()},
+    ))
+
+    campaign_totals = (
+        select(
+            Campaign.tenant_id,
+            func.count(Campaign.id).label("total_campaigns"),
+            func.count(Campaign.id).filter(Campaign.status == CampaignStatus.active).label("active_campaigns"),
+            func.sum(Campaign.goal_amount).label("total_goal_amount"),
+            func.sum(Campaign.current_amount).label("total_raised"),
+        )
+        .group_by(Campaign.tenant_id)
+        .subquery()
+    )
+    donation_totals = (
+        select(
+            Donation.tenant_id,
+            func.count(Donation.id).label("success_count"),
+            func.count(func.distinct(Donation.donor_email)).label("donor_count"),
+            func.max(Donation.donated_at).label("last_donation_at"),
+        )
+        .where(Donation.status == PaymentStatus.SUCCESS)
+        .group_by(Donation.tenant_id)
+        .subquery()
+    )
+    tenant_rows = (
+        select(
+            Tenant.id,
+            func.coalesce(campaign_totals.c.total_campaigns, 0),
+            func.coalesce(campaign_totals.c.active_campaigns, 0),
+            func.coalesce(campaign_totals.c.total_goal_amount, 0),
+            func.coalesce(campaign_totals.c.total_raised, 0),
+            func.coalesce(donation_totals.c.success_count, 0),
+            func.coalesce(donation_totals.c.donor_count, 0),
+            donation_totals.c.last_donation_at,
+        )
+        .outerjoin(campaign_totals, campaign_totals.c.tenant_id == Tenant.id)
+        .outerjoin(donation_totals, donation_totals.c.tenant_id == Tenant.id)
+    )
+    if tenant_id:
+        tenant_rows = tenant_rows.where(Tenant.id == tenant_id)
+
+    columns = ["tenant_id", "total_campaigns", "active_campaigns", "total_goal_amount", "total_raised",
+               "success_count", "donor_count", "last_donation_at"]
+    stmt = insert(TenantStats).from_select(columns, tenant_rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[TenantStats.tenant_id],
+        set_={column: stmt.excluded[column] for column in columns[1:]} | {"updated_at": func.now()},
+    ))
+
+    # Daily buckets are replaced wholesale so days that no longer have donations disappear
+    clear_days = delete(DonationDailyStats)
+    if tenant_id:
+        clear_days = clear_days.where(DonationDailyStats.tenant_id == tenant_id)
+    db.execute(clear_days)
+
+    day = cast(func.timezone("UTC", Donation.donated_at), Date)
+    daily_rows = (
+        select(Donation.campaign_id, day, Donation.tenant_id, func.count(Donation.id), func.sum(Donation.amount))
+        .where(Donation.status == PaymentStatus.SUCCESS, Donation.donated_at.isnot(None))
+        .group_by(Donation.campaign_id, day, Donation.tenant_id)
+    )
+    if tenant_id:
+        daily_rows = daily_rows.where(Donation.tenant_id == tenant_id)
+    db.execute(insert(DonationDailyStats).from_select(
+        ["campaign_id", "day", "tenant_id", "donation_count", "total_amount"], daily_rows
+    ))
+    db.commit()
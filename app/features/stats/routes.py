@@ -1,15 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, and_, Float, cast
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.common.deps import require_tenant_admin
+from app.common.handle_error import handle_error
 from app.db.index import get_db
-from app.features.donation.models import Donation, PaymentStatus
-from app.features.campaign.models import Campaign, CampaignStatus
+from app.features.stats.services import get_tenant_dashboard_stats, get_donation_timeseries, TimeBucket, \
+    MAX_HOURLY_RANGE
 
 router = APIRouter()
 
 
+def as_utc(value: datetime) -> datetime:
+    # Query params may come with or without an offset, naive ones are read as UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
 @router.get("/dashboard")
 def get_dashboard_stats(
         db: Session = Depends(get_db),
@@ -19,76 +27,30 @@ def get_dashboard_stats(
     if not tenant:
         raise HTTPException(status_code=404, detail="No tenant found for this auth")
 
-    total_campaigns = db.query(func.count(Campaign.id)).filter(Campaign.tenant_id == tenant.id).scalar()
-
-    total_amount_contributed = db.query(func.sum(Donation.amount)).filter(
-        and_(Donation.tenant_id == tenant.id, Donation.status == PaymentStatus.SUCCESS)).scalar()
-
-    total_current = db.query(func.sum(Campaign.current_amount)).filter(Campaign.tenant_id == tenant.id).scalar()
-    total_goal_amount = db.query(func.sum(Campaign.goal_amount)).filter(Campaign.tenant_id == tenant.id).scalar()
-
-    success_rate = (total_current / total_goal_amount) * 100 if total_goal_amount and total_goal_amount > 0 else 0.0
-    success_rate_expr = (
-            (cast(Campaign.current_amount, Float) / cast(Campaign.goal_amount, Float)) * 100
-    )
-
-    total_donors = db.query(func.count(Donation.id)).filter(Donation.tenant_id == tenant.id).scalar()
-
-    recent_donors = (db.query(
-        Donation.id,
-        Donation.donor_name,
-        Donation.amount,
-        Donation.method,
-        Campaign.title.label("campaign_name")
-    )
-                     .filter(and_(
-        Donation.tenant_id == tenant.id,
-        Donation.status == PaymentStatus.SUCCESS
-    )).order_by(Donation.donated_at.asc())
-                     .limit(5).all())
-    recent_donors = [
-        {
-            "id": row.id,
-            "donor_name": row.donor_name if row.donor_name else "Anonymous",
-            "amount": row.amount,
-            "paymentMethod": row.method,
-            "campaign_name": row.campaign_name
-        } for row in recent_donors
-    ]
-    top_performing_campaigns = (
-        db.query(
-            Campaign.id,
-            Campaign.title,
-            Campaign.current_amount,
-            success_rate_expr.label("success_rate")
-        )
-        .filter(
-            and_(
-                Campaign.tenant_id == tenant.id,
-                Campaign.status == CampaignStatus.active,
-                Campaign.goal_amount.isnot(None),
-                Campaign.goal_amount > 0
-            )
-        )
-        .order_by(
-            (cast(Campaign.current_amount, Float) / Campaign.goal_amount).desc()
-        )
-        .limit(5)
-        .all()
-    )
-
-    top_performing_campaigns = [
-        {
-            "id": row.id,
-            "title": row.title,
-            "amount": row.current_amount,
-            "success_rate": float(row.success_rate) if row.success_rate else 0.0
-        }
-        for row in top_performing_campaigns
-    ]
-    return {"total_campaigns": total_campaigns, "total_amount_contributed": total_amount_contributed,
-            "overall_success_rate": success_rate,
-            "top_performing_campaigns": top_performing_campaigns, "recent_donors": recent_donors,
-            "total_donors": total_donors, }
+    return get_tenant_dashboard_stats(db, tenant.id)
 
 
+@router.get("/timeseries")
+def get_timeseries_stats(
+        interval: TimeBucket = Query(TimeBucket.day, description="Bucket size"),
+        campaign_id: UUID | None = Query(None, description="Limit to one campaign, defaults to the whole tenant"),
+        start: datetime | None = Query(None, description="Defaults to 30 days before end"),
+        end: datetime | None = Query(None, description="Defaults to now"),
+        db: Session = Depends(get_db),
+        auth=Depends(require_tenant_admin)
+):
+    user, tenant = auth
+    end = as_utc(end) if end else datetime.now(timezone.utc)
+    start = as_utc(start) if start else end - timedelta(days=30)
+    if start > end:
+        handle_error(400, "start must be before end")
+    if interval == TimeBucket.hour and end - start > MAX_HOURLY_RANGE:
+        handle_error(400, f"Hourly series are limited to {MAX_HOURLY_RANGE.days} days")
+
+    return {
+        "interval": interval,
+        "campaign_id": campaign_id,
+        "start": start,
+        "end": end,
+        "series": get_donation_timeseries(db, tenant.id, interval, start, end, campaign_id),
+    }
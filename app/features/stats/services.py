@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+from enum import Enum
+from uuid import UUID
+
+from sqlalchemy import func, select, cast, Float, true, DateTime
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+
+from app.features.campaign.models import Campaign, CampaignStatus
+from app.features.donation.models import Donation, PaymentStatus
+from app.features.stats.models import TenantStats, DonationDailyStats
+
+# Hourly buckets scan campaign_donations directly, so keep the window small
+MAX_HOURLY_RANGE = timedelta(days=31)
+
+
+class TimeBucket(str, Enum):
+    hour = "hour"
+    day = "day"
+    week = "week"
+
+
+def get_tenant_dashboard_stats(db: Session, tenant_id: UUID) -> dict:
+    """
+    Build the tenant dashboard payload in a single round trip.
+
+    Campaign totals are read from the tenant_stats rollup, donation totals come from a conditional-aggregation
+    CTE, the recent donors and top performing campaigns lists are folded into the same row with json_agg.
+    """
+    campaign_totals = (
+        select(
+            TenantStats.total_campaigns,
+            TenantStats.total_raised.label("total_current"),
+            TenantStats.total_goal_amount,
+        )
+        .where(TenantStats.tenant_id == tenant_id)
+        .cte("campaign_totals")
+    )
+
+    donation_totals = (
+        select(
+            func.sum(Donation.amount).filter(Donation.status == PaymentStatus.SUCCESS)
+            .label("total_amount_contributed"),
+            func.count(Donation.id).label("total_donors"),
+        )
+        .where(Donation.tenant_id == tenant_id)
+        .cte("donation_totals")
+    )
+
+    recent_donors = (
+        select(
+            Donation.id,
+            Donation.donor_name,
+            Donation.amount,
+            Donation.method,
+            Donation.donated_at,
+            Campaign.title.label("campaign_name"),
+        )
+        .join(Campaign, Campaign.id == Donation.campaign_id)
+        .where(Donation.tenant_id == tenant_id, Donation.status == PaymentStatus.SUCCESS)
+        .order_by(Donation.donated_at.asc())
+        .limit(5)
+        .cte("recent_donors")
+    )
+
+    funded_ratio = cast(Campaign.current_amount, Float) / cast(Campaign.goal_amount, Float)
+    top_campaigns = (
+        select(
+            Campaign.id,
+            Campaign.title,
+            Campaign.current_amount,
+            (funded_ratio * 100).label("success_rate"),
+        )
+        .where(
+            Campaign.tenant_id == tenant_id,
+            Campaign.status == CampaignStatus.active,
+            Campaign.goal_amount.isnot(None),
+            Campaign.goal_amount > 0,
+        )
+        .order_by(funded_ratio.desc())
+        .limit(5)
+        .cte("top_campaigns")
+    )
+
+    recent_donors_json = select(
+        func.json_agg(aggregate_order_by(
+            func.json_build_object(
+                "id", recent_donors.c.id,
+                "donor_name", func.coalesce(func.nullif(recent_donors.c.donor_name, ""), "Anonymous"),
+                "amount", recent_donors.c.amount,
+                "paymentMethod", recent_donors.c.method,
+                "campaign_name", recent_donors.c.campaign_name,
+            ),
+            recent_donors.c.donated_at.asc(),
+        ))
+    ).scalar_subquery()
+
+    top_campaigns_json = select(
+        func.json_agg(aggregate_order_by(
+            func.json_build_object(
+                "id", top_campaigns.c.id,
+                "title", top_campaigns.c.title,
+                "amount", top_campaigns.c.current_amount,
+                "success_rate", func.coalesce(top_campaigns.c.success_rate, 0.0),
+            ),
+            top_campaigns.c.success_rate.desc(),
+        ))
+    ).scalar_subquery()
+
+    row = db.execute(
+        select(
+            func.coalesce(campaign_totals.c.total_campaigns, 0).label("total_campaigns"),
+            campaign_totals.c.total_current,
+            campaign_totals.c.total_goal_amount,
+            donation_totals.c.total_amount_contributed,
+            donation_totals.c.total_donors,
+            recent_donors_json.label("recent_donors"),
+            top_campaigns_json.label("top_performing_campaigns"),
+        ).select_from(donation_totals.outerjoin(campaign_totals, true()))
+    ).one()
+
+    total_current, total_goal_amount = row.total_current, row.total_goal_amount
+    success_rate = (total_current / total_goal_amount) * 100 if total_goal_amount and total_goal_amount > 0 else 0.0
+
+    return {
+        "total_campaigns": row.total_campaigns,
+        "total_amount_contributed": row.total_amount_contributed,
+        "overall_success_rate": success_rate,
+        "top_performing_campaigns": row.top_performing_campaigns or [],
+        "recent_donors": row.recent_donors or [],
+        "total_donors": row.total_donors,
+    }
+
+
+def get_donation_timeseries(
+        db: Session,
+        tenant_id: UUID,
+        interval: TimeBucket,
+        start: datetime,
+        end: datetime,
+        campaign_id: UUID | None = None,
+) -> list[dict]:
+    """
+    Successful donation counts and amounts bucketed by hour, day or week.
+
+    Day and week buckets are rolled up from donation_daily_stats (one row per campaign per UTC day),
+    hour buckets are computed from campaign_donations and limited to MAX_HOURLY_RANGE.
+    Buckets are truncated in UTC whatever the session timezone, start and end must be timezone-aware.
+    Buckets without donations are omitted.
+    """
+    if interval == TimeBucket.hour:
+        bucket = func.timezone(
+            "UTC", func.date_trunc("hour", func.timezone("UTC", Donation.donated_at))
+        ).label("bucket")
+        query = (
+            select(bucket, func.count(Donation.id), func.sum(Donation.amount))
+            .where(
+                Donation.tenant_id == tenant_id,
+                Donation.status == PaymentStatus.SUCCESS,
+                Donation.donated_at >= start,
+                Donation.donated_at <= end,
+            )
+        )
+        if campaign_id:
+            query = query.where(Donation.campaign_id == campaign_id)
+    else:
+        # day is a UTC date, truncate it as a plain timestamp so the session timezone never applies
+        bucket = func.timezone(
+            "UTC", func.date_trunc(interval.value, cast(DonationDailyStats.day, DateTime))
+        ).label("bucket")
+        query = (
+            select(bucket, func.sum(DonationDailyStats.donation_count), func.sum(DonationDailyStats.total_amount))
+            .where(
+                DonationDailyStats.tenant_id == tenant_id,
+                DonationDailyStats.day >= start.date(),
+                DonationDailyStats.day <= end.date(),
+            )
+        )
+        if campaign_id:
+            query = query.where(DonationDailyStats.campaign_id == campaign_id)
+
+    rows = db.execute(query.group_by(bucket).order_by(bucket)).all()
+    return [
+        {"bucket": row[0], "donation_count": int(row[1] or 0), "total_amount": row[2] or 0}
+        for row in rows
+    ]
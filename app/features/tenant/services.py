@@ -10,15 +10,16 @@ from app.common.auth import hash_password
 from app.common.handle_error import handle_error
 from app.features.auth.models import User
 from app.features.campaign.models import Campaign
+from app.features.stats.models import TenantStats
 from app.features.tenant.models import Tenant, TenantSupportDocuments
 
 
 def get_all_tenants(db: Session, verified: bool = None, search: str = None, page: int = 1, limit: int = 10, ):
     query = (
         db.query(Tenant,
-                 func.count(Campaign.id).label("total_campaigns"),
-                 func.coalesce(func.sum(Campaign.current_amount), 0).label("total_raised"),
-                 ).outerjoin(Campaign, Tenant.id == Campaign.tenant_id).group_by(Tenant.id)
+                 func.coalesce(TenantStats.total_campaigns, 0).label("total_campaigns"),
+                 func.coalesce(TenantStats.total_raised, 0).label("total_raised"),
+                 ).outerjoin(TenantStats, Tenant.id == TenantStats.tenant_id)
     )
     if verified is not None:
         query = query.filter(Tenant.is_Verified == bool(verified))
@@ -38,9 +39,9 @@ def get_all_tenants(db: Session, verified: bool = None, search: str = None, page
 def get_tenant_by_id(db: Session, tenant_id: UUID):
     return (
         db.query(Tenant,
-                 func.count(Campaign.id).label("total_campaigns"),
-                 func.coalesce(func.sum(Campaign.current_amount), 0).label("total_raised"),
-                 ).outerjoin(Campaign, Tenant.id == Campaign.tenant_id).group_by(Tenant.id)
+                 func.coalesce(TenantStats.total_campaigns, 0).label("total_campaigns"),
+                 func.coalesce(TenantStats.total_raised, 0).label("total_raised"),
+                 ).outerjoin(TenantStats, Tenant.id == TenantStats.tenant_id)
         .filter(Tenant.id == tenant_id).first()
     )
 
@@ -1,4 +1,6 @@
 import os
+import asyncio
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, Depends, Request
@@ -8,11 +10,37 @@ from starlette.responses import JSONResponse
 
 from app import routes as v2_routes
 from app.common.deps import get_current_user
+from app.db.index import async_engine
 from app.features.auth.models import User
+from app.features.campaign.counters import write_behind_enabled, run_flusher
+from app.features.donation.status_events import status_broker
+from app.features.payments.mpesa.client import mpesa_client
+from app.logger import logger
 from app.middlewares.logging_middleware import logging_middleware
+from app.services.rabbitmq.publisher import publisher
 
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    stop_flusher = asyncio.Event()
+    flusher = asyncio.create_task(run_flusher(stop_flusher)) if write_behind_enabled() else None
+    try:
+        await publisher.start()
+    except Exception as e:
+        # The API still serves without the broker, the first publish retries the connection
+        logger.warning(f"RabbitMQ publisher failed to start: {e}")
+    yield
+    if flusher:
+        stop_flusher.set()
+        await flusher
+    await publisher.close()
+    await status_broker.close()
+    await mpesa_client.aclose()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title=os.getenv("APP_NAME", "DonateHub"),
     version="1.0.0",
@@ -20,6 +48,7 @@ app = FastAPI(
     swagger_ui_parameters={
         "defaultModelsExpandDepth": -1
     },
+    lifespan=lifespan,
 )
 
 origins = [
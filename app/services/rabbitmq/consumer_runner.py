@@ -1,38 +1,150 @@
+"""
+Run RabbitMQ consumers, each queue on its own channel with its own prefetch and a bounded pool of handler tasks.
+
+Every queue runs by default. Pick a subset to scale queues independently across processes:
+
+    python -m app.services.rabbitmq.consumer_runner
+    python -m app.services.rabbitmq.consumer_runner --queues payment
+    python -m app.services.rabbitmq.consumer_runner --queues email_verification email_requests --concurrency 20
+
+SIGTERM/SIGINT stop new deliveries, let in-flight messages finish for up to CONSUMER_DRAIN_TIMEOUT_SECONDS and then
+close the connection. Anything still unacked is redelivered by RabbitMQ to another consumer.
+"""
+import argparse
 import asyncio
+import signal
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
 
 from aio_pika import ExchangeType
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage, AbstractQueue
 
+from app.common.smtp_pool import smtp_pool
+from app.config import settings
 from app.logger import logger
-from app.services.rabbitmq.connection import get_channel
+from app.services.rabbitmq.connection import get_connection
+from app.services.rabbitmq.publisher import DONATION_EVENTS_EXCHANGE
+from app.services.template_renderer import precompile_templates
 from app.workers.SMS_Worker import handle_sms
-from app.workers.email_verification_worker import email_verification_worker
+from app.workers.email_verification_worker import email_verification_consumer
 from app.workers.email_worker import handle_email
+from app.workers.payment_worker import payment_consumer
+
+Handler = Callable[[AbstractIncomingMessage], Awaitable[None]]
+
+
+@dataclass
+class ConsumerSpec:
+    # Declares the queue's topology on the given channel, returns the queue and its message handler
+    setup: Callable[[AbstractChannel], Awaitable[tuple[AbstractQueue, Handler]]]
+    prefetch: int = settings.CONSUMER_PREFETCH_COUNT
+    concurrency: int = settings.CONSUMER_CONCURRENCY
+
+
+def fanout_consumer(queue_name: str, handler: Handler):
+    async def setup(channel: AbstractChannel) -> tuple[AbstractQueue, Handler]:
+        # Fanout exchange - > every bound queue gets each donation event
+        exchange = await channel.declare_exchange(DONATION_EVENTS_EXCHANGE, ExchangeType.FANOUT)
+        queue = await channel.declare_queue(queue_name, durable=True)
+        await queue.bind(exchange)
+        return queue, handler
+
+    return setup
+
+
+CONSUMERS: dict[str, ConsumerSpec] = {
+    "email_requests": ConsumerSpec(fanout_consumer("email_requests", handle_email)),
+    "sms_receipts": ConsumerSpec(fanout_consumer("sms_receipts", handle_sms)),
+    "email_verification": ConsumerSpec(email_verification_consumer),
+    # Each handler task is one in-flight STK push, Daraja limits how many we should have open
+    "payment": ConsumerSpec(
+        payment_consumer,
+        prefetch=settings.PAYMENT_WORKER_CONCURRENCY,
+        concurrency=settings.PAYMENT_WORKER_CONCURRENCY,
+    ),
+}
+
+
+class QueueConsumer:
+    """
+    One queue on its own channel. Deliveries are capped by prefetch, handlers by a semaphore of `concurrency`.
+
+    Prefetch above concurrency keeps a few messages buffered locally so a freed handler slot never waits on the
+    broker round trip.
+    """
 
+    def __init__(self, name: str, spec: ConsumerSpec, prefetch: Optional[int] = None,
+                 concurrency: Optional[int] = None):
+        self.name = name
+        self.spec = spec
+        self.prefetch = prefetch or spec.prefetch
+        self.concurrency = concurrency or spec.concurrency
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._in_flight: set[asyncio.Task] = set()
+        self._channel: Optional[AbstractChannel] = None
+        self._queue: Optional[AbstractQueue] = None
+        self._consumer_tag: Optional[str] = None
+        self._handler: Optional[Handler] = None
 
-async def start_consumer(queue_name: str, handler, channel, exchange):
-    queue = await channel.declare_queue(queue_name, durable=True)
-    await queue.bind(exchange)
-    await queue.consume(handler)
-    logger.info(f"Started consumer: {queue_name}")
+    async def start(self, connection) -> None:
+        self._channel = await connection.channel()
+        await self._channel.set_qos(prefetch_count=max(self.prefetch, self.concurrency))
+        self._queue, self._handler = await self.spec.setup(self._channel)
+        self._consumer_tag = await self._queue.consume(self._on_message)
+        logger.info(f"Started consumer: {self.name} (prefetch={self.prefetch}, concurrency={self.concurrency})")
 
+    async def _on_message(self, message: AbstractIncomingMessage) -> None:
+        # aio-pika runs each delivery in its own task, track it so shutdown can wait for it
+        task = asyncio.current_task()
+        self._in_flight.add(task)
+        try:
+            async with self._slots:
+                await self._handler(message)
+        except Exception as e:
+            logger.error(f"Consumer {self.name} failed to handle message: {e}")
+        finally:
+            self._in_flight.discard(task)
 
-async def main():
-    channel = await get_channel()
+    async def stop(self, timeout: float) -> None:
+        if self._queue is not None and self._consumer_tag is not None:
+            # Stop deliveries first, messages already prefetched still run
+            await self._queue.cancel(self._consumer_tag)
+        if self._in_flight:
+            logger.info(f"Draining {len(self._in_flight)} in-flight messages from {self.name}")
+            _, still_running = await asyncio.wait(set(self._in_flight), timeout=timeout)
+            if still_running:
+                # Not cancelled, process() would reject them into the DLQ. Closing the channel requeues them instead.
+                logger.warning(f"{len(still_running)} messages from {self.name} unfinished, leaving them to redelivery")
+        if self._channel is not None:
+            await self._channel.close()
 
-    # Declare fanout exchange
-    exchange = await channel.declare_exchange("donation_events", ExchangeType.FANOUT)
 
-    # Start consumers concurrently
-    await asyncio.gather(
-        start_consumer("email_requests", handle_email, channel, exchange),
-        start_consumer("sms_receipts", handle_sms, channel, exchange),
-        email_verification_worker(channel)
-    )
+async def main(queues: list[str], prefetch: Optional[int] = None, concurrency: Optional[int] = None):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
 
-    logger.info("All consumers are running ... waiting for message")
+    precompile_templates()
+    connection = await get_connection()
+    consumers = [QueueConsumer(name, CONSUMERS[name], prefetch, concurrency) for name in queues]
+    try:
+        await asyncio.gather(*[consumer.start(connection) for consumer in consumers])
+        logger.info("All consumers are running ... waiting for message")
+        await stop.wait()
 
-    await asyncio.Future()
+        logger.info("Shutting down consumers")
+        await asyncio.gather(*[consumer.stop(settings.CONSUMER_DRAIN_TIMEOUT_SECONDS) for consumer in consumers])
+    finally:
+        await connection.close()
+        await smtp_pool.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queues", nargs="+", choices=list(CONSUMERS), default=list(CONSUMERS),
+                        help="Queues this process consumes, all of them by default")
+    parser.add_argument("--prefetch", type=int, help="Override the prefetch_count of every selected queue")
+    parser.add_argument("--concurrency", type=int, help="Override the handler tasks of every selected queue")
+    args = parser.parse_args()
+    asyncio.run(main(args.queues, args.prefetch, args.concurrency))
@@ -1,62 +1,185 @@
+import asyncio
 import json
+import time
+from dataclasses import dataclass
 from enum import Enum
+from typing import Iterable, Optional
 
 import aio_pika
 from aio_pika import ExchangeType, DeliveryMode
+from aio_pika.abc import AbstractChannel, AbstractExchange, AbstractRobustConnection
+from aio_pika.pool import Pool
 
+from app.config import settings
 from app.logger import logger
-from app.services.rabbitmq.connection import get_connection, get_channel
+from app.services.rabbitmq.connection import get_connection
 
 
 class Exchanges(str, Enum):
     NOTIFICATIONS = "notifications"
+    PAYMENTS = "payments"
 
 
 class RoutingKeys(str, Enum):
     EMAIL_VERIFICATION = "email.verification"
     EMAIL_RESET_PASSWORD = "email.reset_password"
     SMS_AUTH = "sms.auth"
+    PAYMENT_INITIATE = "payment.initiate"
+
+
+# Fanout exchange the donation consumers bind to, declared non-durable by consumer_runner
+DONATION_EVENTS_EXCHANGE = "donation_events"
+
+
+@dataclass
+class PublishStats:
+    published: int
+    failed: int
+    seconds: float
+
+    @property
+    def per_second(self) -> float:
+        return self.published / self.seconds if self.seconds else float(self.published)
+
+
+class Publisher:
+    """
+    Process-wide AMQP publisher sharing one robust connection and a small pool of confirm channels.
+
+    Exchanges are declared once per process and then looked up by name, so a publish is a single basic.publish plus
+    the broker's confirm. Channels are opened with publisher confirms, publish() returns only once RabbitMQ has taken
+    responsibility for the message and raises if it was nacked or returned.
+    """
+
+    def __init__(self, channels: int = settings.RABBITMQ_PUBLISHER_CHANNELS):
+        self.channels = channels
+        self._connection: Optional[AbstractRobustConnection] = None
+        self._pool: Optional[Pool] = None
+        self._declared: set[str] = set()
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self._pool is not None:
+                return
+            self._connection = await get_connection()
+            self._pool = Pool(self._open_channel, max_size=self.channels)
+            logger.info(f"RabbitMQ publisher connected with up to {self.channels} channels")
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._pool is not None:
+                await self._pool.close()
+                self._pool = None
+            if self._connection is not None:
+                await self._connection.close()
+                self._connection = None
+            self._declared.clear()
+
+    async def _open_channel(self) -> AbstractChannel:
+        # Messages are published mandatory, a return (no queue bound for the routing key) raises DeliveryError
+        # instead of resolving as a successful confirm
+        return await self._connection.channel(publisher_confirms=True, on_return_raises=True)
+
+    async def _exchange(self, channel: AbstractChannel, name: str, exchange_type: ExchangeType,
+                        durable: bool) -> AbstractExchange:
+        if name in self._declared:
+            # Exchange objects are per channel, getting one without ensure=True doesn't touch the broker
+            return await channel.get_exchange(name, ensure=False)
+        exchange = await channel.declare_exchange(name, exchange_type, durable=durable)
+        self._declared.add(name)
+        return exchange
+
+    async def publish(self, exchange_name: str, routing_key: str, body: dict,
+                      exchange_type: ExchangeType = ExchangeType.TOPIC, durable: bool = True,
+                      delivery_mode: DeliveryMode = DeliveryMode.PERSISTENT) -> None:
+        if self._pool is None:
+            # Started lazily too, for scripts and workers that publish without the API lifespan
+            await self.start()
+        message = aio_pika.Message(body=json.dumps(body).encode(), delivery_mode=delivery_mode)
+        async with self._pool.acquire() as channel:
+            exchange = await self._exchange(channel, exchange_name, exchange_type, durable)
+            await exchange.publish(message, routing_key=routing_key)
+
+    async def publish_many(self, exchange_name: str, routing_key: str, bodies: Iterable[dict],
+                           window: int = settings.RABBITMQ_PUBLISH_CONFIRM_WINDOW) -> PublishStats:
+        """
+        Pipeline many messages on one channel, keeping at most `window` publisher confirms outstanding.
+
+        Messages are sent without waiting for each confirm, the window bounds memory and how much the broker has
+        to buffer. Failed messages (nacked, returned or lost with the channel) are counted rather than raised so
+        one bad message doesn't abort a fan-out; callers check PublishStats.failed.
+        """
+        if self._pool is None:
+            await self.start()
+        window_slots = asyncio.Semaphore(window)
+        pending: set[asyncio.Task] = set()
+        published = failed = 0
+
+        def confirmed(task: asyncio.Task) -> None:
+            nonlocal published, failed
+            pending.discard(task)
+            window_slots.release()
+            if task.cancelled() or task.exception():
+                failed += 1
+            else:
+                published += 1
+
+        started = time.perf_counter()
+        async with self._pool.acquire() as channel:
+            exchange = await self._exchange(channel, exchange_name, ExchangeType.TOPIC, durable=True)
+            for body in bodies:
+                await window_slots.acquire()
+                message = aio_pika.Message(body=json.dumps(body).encode(), delivery_mode=DeliveryMode.PERSISTENT)
+                task = asyncio.create_task(exchange.publish(message, routing_key=routing_key))
+                pending.add(task)
+                task.add_done_callback(confirmed)
+            if pending:
+                await asyncio.wait(pending)
+
+        stats = PublishStats(published=published, failed=failed, seconds=time.perf_counter() - started)
+        logger.info(
+            f"[Producer] Bulk published {stats.published} messages with routing_key={routing_key} in "
+            f"{stats.seconds:.2f}s ({stats.per_second:.0f}/s), {stats.failed} failed"
+        )
+        return stats
+
+
+publisher = Publisher()
 
 
 # EXCHANGE TYPE TOPIC
+async def publish_topic(exchange_name: Exchanges, routing_key: RoutingKeys, payload: dict):
+    await publisher.publish(exchange_name.value, routing_key.value, payload)
+    logger.info(f"[Producer] Sent message with routing_key={routing_key.value}: {payload}")
+
+
 async def publish_notification(routing_key: RoutingKeys, payload: dict):
-    connection = await get_connection()
-    async with connection:
-        channel = await get_channel()
+    await publish_topic(Exchanges.NOTIFICATIONS, routing_key, payload)
 
-        # Declare exchange of a type topic
-        exchange = await channel.declare_exchange(
-            Exchanges.NOTIFICATIONS.value, ExchangeType.TOPIC, durable=True
-        )
 
-        # Publish a message with a routing key
-        message = aio_pika.Message(
-            body=json.dumps(payload).encode(),
-            delivery_mode=DeliveryMode.PERSISTENT
-        )
+async def publish_payment(routing_key: RoutingKeys, payload: dict):
+    await publish_topic(Exchanges.PAYMENTS, routing_key, payload)
+
 
-        await exchange.publish(message, routing_key=routing_key.value)
-        logger.info(f"[Producer] Sent message with routing_key={routing_key.value}: {payload}")
+async def publish_many(routing_key: RoutingKeys, payloads: Iterable[dict],
+                       exchange_name: Exchanges = Exchanges.NOTIFICATIONS) -> PublishStats:
+    """Bulk form of publish_notification for campaign-wide fan-out such as receipts or goal-reached emails."""
+    return await publisher.publish_many(exchange_name.value, routing_key.value, payloads)
 
 
 # EXCHANGE TYPE FANOUT
 async def publish_donation_event(donation_id: str, donor_email: str, amount: float):
-    connection = await get_connection()
-    async with connection:
-        channel = await connection.channel()
-
-        # Fanout exchange - > broadcasts to all queues
-        exchange = await channel.declare_exchange("donation_events", aio_pika.ExchangeType.FANOUT)
-
-        event = {
-            "donation_id": donation_id,
-            "donor_email": donor_email,
-            "amount": amount
-        }
-
-        await exchange.publish(
-            aio_pika.Message(body=json.dumps(event).encode()),
-            routing_key=""  # not needed for fanout
-        )
-
-        logger.info(f"[X] Published donation event : {event}")
+    event = {
+        "donation_id": donation_id,
+        "donor_email": donor_email,
+        "amount": amount
+    }
+
+    # Fanout exchange - > broadcasts to all queues, routing key not needed
+    await publisher.publish(
+        DONATION_EVENTS_EXCHANGE, "", event,
+        exchange_type=ExchangeType.FANOUT, durable=False, delivery_mode=DeliveryMode.NOT_PERSISTENT,
+    )
+
+    logger.info(f"[X] Published donation event : {event}")
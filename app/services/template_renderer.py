@@ -1,11 +1,95 @@
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+import os
+import re
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template, TemplateNotFound, \
+    select_autoescape
+from markupsafe import escape
+
+from app.config import settings
+from app.logger import logger
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+
+# Rendered by the email workers, compiled up front so the first message doesn't pay for it
+PRECOMPILED_TEMPLATES = (
+    "email/donation_receipt.html.j2",
+    "email/email_verification.html.j2",
+    "email/reset_password_email.html.j2",
+)
+
+
+def _bytecode_cache() -> FileSystemBytecodeCache:
+    if settings.TEMPLATE_BYTECODE_CACHE_DIR:
+        os.makedirs(settings.TEMPLATE_BYTECODE_CACHE_DIR, exist_ok=True)
+        return FileSystemBytecodeCache(settings.TEMPLATE_BYTECODE_CACHE_DIR)
+    return FileSystemBytecodeCache()
+
 
 jinja_env = Environment(
-    loader=FileSystemLoader("/app/app/templates"),
-    autoescape=select_autoescape(["html", "xml"])
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=select_autoescape(["html", "xml"]),
+    # Compiled templates are persisted across restarts, a new worker only re-parses templates that changed
+    bytecode_cache=_bytecode_cache(),
+    # _compiled below is the template cache, keyed by mtime so edited templates are picked up without a restart
+    cache_size=0,
 )
 
 
+@lru_cache(maxsize=64)
+def _compiled(template_name: str, mtime_ns: int) -> Template:
+    return jinja_env.get_template(template_name)
+
+
+def get_template(template_name: str) -> Template:
+    try:
+        mtime_ns = (TEMPLATES_DIR / template_name).stat().st_mtime_ns
+    except OSError:
+        raise TemplateNotFound(template_name)
+    return _compiled(template_name, mtime_ns)
+
+
 def render_template(template_name: str, context: dict) -> str:
-    template = jinja_env.get_template(template_name)
-    return template.render(**context)
+    return get_template(template_name).render(**context)
+
+
+def precompile_templates(template_names=PRECOMPILED_TEMPLATES) -> None:
+    """Compile the email templates into the in-memory cache and the bytecode cache, call at worker startup."""
+    for template_name in template_names:
+        get_template(template_name)
+    logger.info(f"Precompiled {len(template_names)} templates")
+
+
+class TemplateShell:
+    """
+    A template rendered once with the context shared by every recipient, leaving slots for per-recipient fields.
+
+    Filling a shell is a string join, for fan-outs like campaign receipts where only the name, email or amount change
+    between messages. Per-recipient fields must be printed plainly (`{{ donor_name }}`), not branched on or passed
+    through filters, since the shell was rendered before their values were known. Values are escaped like Jinja
+    would for HTML templates.
+    """
+
+    def __init__(self, template_name: str, shared_context: dict, recipient_fields: list[str]):
+        marker = uuid.uuid4().hex
+        placeholders = {field: f"@@{marker}:{field}@@" for field in recipient_fields}
+        rendered = render_template(template_name, {**shared_context, **placeholders})
+        # re.split with a capture group alternates static text and field names
+        parts = re.split(rf"@@{marker}:(\w+)@@", rendered)
+        self.static_parts = parts[0::2]
+        self.fields = parts[1::2]
+        self.autoescape = jinja_env.autoescape(template_name) if callable(jinja_env.autoescape) \
+            else jinja_env.autoescape
+
+    def render(self, recipient_context: dict) -> str:
+        values = [
+            str(escape(recipient_context[field])) if self.autoescape else str(recipient_context[field])
+            for field in self.fields
+        ]
+        out = [self.static_parts[0]]
+        for value, static in zip(values, self.static_parts[1:]):
+            out.append(value)
+            out.append(static)
+        return "".join(out)
@@ -1,7 +1,9 @@
 import json
+from typing import Callable
 
 import aio_pika
 from aio_pika import Channel, ExchangeType, DeliveryMode
+from aio_pika.abc import AbstractIncomingMessage, AbstractQueue
 
 from app.common.send_email import send_verification_email
 from app.logger import logger
@@ -13,7 +15,8 @@ DLX_NAME = "dlx.notifications"
 MAX_RETRIES = 3
 
 
-async def email_verification_worker(channel: Channel):
+# Declare the email.verification topology -> returns the main queue and its message handler for consumer_runner
+async def email_verification_consumer(channel: Channel) -> tuple[AbstractQueue, Callable]:
     # Declare main exchange
     exchange = await channel.declare_exchange(
         Exchanges.NOTIFICATIONS.value,
@@ -55,44 +58,43 @@ async def email_verification_worker(channel: Channel):
     )
     await queue.bind(exchange, routing_key=RoutingKeys.EMAIL_VERIFICATION.value)
 
-    logger.info("Listening for email.verification events...")
-
-    async with queue.iterator() as queue_iter:
-        async for message in queue_iter:
-            async with message.process(ignore_processed=True):
-                try:
-                    payload = json.loads(message.body)
-                    email = payload["email"]
-
-                    logger.info(f"Processing verification email for {email}")
-                    res = await send_verification_email(email, payload)
-
-                    if not res:
-                        raise Exception("Email send failed")
-
-                    logger.info(f"Email sent successfully: {res}")
-
-                except Exception as e:
-                    retries = (message.headers or {}).get("x-retry", 0)
-
-                    if retries >= MAX_RETRIES:
-                        await dlx.publish(
-                            aio_pika.Message(
-                                body=message.body,
-                                delivery_mode=DeliveryMode.PERSISTENT
-                            ),
-                            routing_key=RoutingKeys.EMAIL_VERIFICATION.value
-                        )
-                        logger.warning(f"Moved to DLQ after {MAX_RETRIES} retries: {message.body}")
-                    else:
-                        await exchange.publish(
-                            aio_pika.Message(
-                                body=message.body,
-                                delivery_mode=DeliveryMode.PERSISTENT,
-                                headers={"x-retry": retries + 1}
-                            ),
-                            routing_key=RETRY_QUEUE
-                        )
-                        logger.info(f"Sent to retry queue (retry={retries + 1})")
-
-                    await message.ack()
+    async def handle(message: AbstractIncomingMessage):
+        async with message.process(ignore_processed=True):
+            try:
+                payload = json.loads(message.body)
+                email = payload["email"]
+
+                logger.info(f"Processing verification email for {email}")
+                res = await send_verification_email(email, payload)
+
+                if not res:
+                    raise Exception("Email send failed")
+
+                logger.info(f"Email sent successfully: {res}")
+
+            except Exception as e:
+                retries = (message.headers or {}).get("x-retry", 0)
+
+                if retries >= MAX_RETRIES:
+                    await dlx.publish(
+                        aio_pika.Message(
+                            body=message.body,
+                            delivery_mode=DeliveryMode.PERSISTENT
+                        ),
+                        routing_key=RoutingKeys.EMAIL_VERIFICATION.value
+                    )
+                    logger.warning(f"Moved to DLQ after {MAX_RETRIES} retries: {message.body}")
+                else:
+                    await exchange.publish(
+                        aio_pika.Message(
+                            body=message.body,
+                            delivery_mode=DeliveryMode.PERSISTENT,
+                            headers={"x-retry": retries + 1}
+                        ),
+                        routing_key=RETRY_QUEUE
+                    )
+                    logger.info(f"Sent to retry queue (retry={retries + 1})")
+
+                await message.ack()
+
+    return queue, handle
@@ -0,0 +1,136 @@
+import json
+from typing import Callable
+from uuid import UUID
+
+import aio_pika
+from aio_pika import Channel, ExchangeType, DeliveryMode
+from aio_pika.abc import AbstractIncomingMessage, AbstractQueue
+
+from app.db.index import AsyncSessionLocal
+from app.features.donation.models import PaymentStatus
+from app.features.donation.services import fetch_donation_for_payment
+from app.features.donation.status_events import publish_donation_status
+from app.features.payments.mpesa.client import CONNECT_ERRORS
+from app.features.payments.services import process_payment
+from app.logger import logger
+from app.services.rabbitmq.publisher import Exchanges, RoutingKeys
+
+RETRY_QUEUE = "payment_initiate_retry_queue"
+DLQ_QUEUE = "payment_initiate_dlq"
+DLX_NAME = "dlx.payments"
+MAX_RETRIES = 3
+
+
+def is_retryable(error: Exception) -> bool:
+    # Only a connection that never came up proves the push didn't reach Daraja. Anything else, including a decode
+    # or commit error after Daraja accepted it, may leave the CheckoutRequestID unsaved and a retry would prompt the
+    # donor twice, so those are marked failed instead.
+    return isinstance(error, CONNECT_ERRORS)
+
+
+async def mark_failed(donation_id: UUID, reason: str):
+    async with AsyncSessionLocal() as db:
+        donation = await fetch_donation_for_payment(db, donation_id)
+        if donation and donation.status == PaymentStatus.PENDING:
+            donation.status = PaymentStatus.FAILED
+            donation.callback_data = {"error": reason}
+            await db.commit()
+            await publish_donation_status(donation)
+
+
+async def initiate_payment(donation_id: UUID):
+    async with AsyncSessionLocal() as db:
+        donation = await fetch_donation_for_payment(db, donation_id)
+        # Redelivered or already settled messages are dropped so each donation gets at most one STK prompt
+        if donation is None or donation.status != PaymentStatus.PENDING or donation.checkout_request_id:
+            logger.info(f"Skipping payment.initiate for donation {donation_id}, nothing to push")
+            return
+
+        result = await process_payment(donation, db)
+        if not result or not result.get("CheckoutRequestID"):
+            # Daraja rejected the request (bad phone number, inactive shortcode...), retrying won't help
+            donation.status = PaymentStatus.FAILED
+            await db.commit()
+            await publish_donation_status(donation)
+            logger.warning(f"STK push rejected for donation {donation_id}: {result}")
+            return
+
+        logger.info(f"STK push sent for donation {donation_id}: {result.get('CheckoutRequestID')}")
+
+
+# Declare the payment.initiate topology -> returns the main queue and its message handler for consumer_runner
+async def payment_consumer(channel: Channel) -> tuple[AbstractQueue, Callable]:
+    # Declare main exchange
+    exchange = await channel.declare_exchange(
+        Exchanges.PAYMENTS.value,
+        ExchangeType.TOPIC,
+        durable=True
+    )
+
+    # Dead letter exchange
+    dlx = await channel.declare_exchange(
+        DLX_NAME,
+        ExchangeType.TOPIC,
+        durable=True
+    )
+
+    # DLQ
+    dlq = await channel.declare_queue(DLQ_QUEUE, durable=True)
+    await dlq.bind(dlx, routing_key=RoutingKeys.PAYMENT_INITIATE.value)
+
+    # Retry queue with TTL (sends back to main exchange after TTL)
+    retry_queue = await channel.declare_queue(
+        RETRY_QUEUE,
+        durable=True,
+        arguments={
+            "x-message-ttl": 5000,  # retry after 5s, the donor is waiting on their phone
+            "x-dead-letter-exchange": Exchanges.PAYMENTS.value,
+            "x-dead-letter-routing-key": RoutingKeys.PAYMENT_INITIATE.value,
+        }
+    )
+    await retry_queue.bind(exchange, routing_key=RETRY_QUEUE)
+
+    # Main queue (with DLX config)
+    queue = await channel.declare_queue(
+        f"{RoutingKeys.PAYMENT_INITIATE.value}_queue",
+        durable=True,
+        arguments={
+            "x-dead-letter-exchange": DLX_NAME,
+            "x-dead-letter-routing-key": RoutingKeys.PAYMENT_INITIATE.value,
+        }
+    )
+    await queue.bind(exchange, routing_key=RoutingKeys.PAYMENT_INITIATE.value)
+
+    async def handle(message: AbstractIncomingMessage):
+        async with message.process(ignore_processed=True):
+            payload = json.loads(message.body)
+            donation_id = UUID(payload["donation_id"])
+            try:
+                await initiate_payment(donation_id)
+            except Exception as e:
+                retries = (message.headers or {}).get("x-retry", 0)
+
+                if retries >= MAX_RETRIES or not is_retryable(e):
+                    await mark_failed(donation_id, str(e))
+                    await dlx.publish(
+                        aio_pika.Message(
+                            body=message.body,
+                            delivery_mode=DeliveryMode.PERSISTENT
+                        ),
+                        routing_key=RoutingKeys.PAYMENT_INITIATE.value
+                    )
+                    logger.warning(f"Moved donation {donation_id} to DLQ after {retries} retries: {e}")
+                else:
+                    await exchange.publish(
+                        aio_pika.Message(
+                            body=message.body,
+                            delivery_mode=DeliveryMode.PERSISTENT,
+                            headers={"x-retry": retries + 1}
+                        ),
+                        routing_key=RETRY_QUEUE
+                    )
+                    logger.info(f"Sent donation {donation_id} to retry queue (retry={retries + 1}): {e}")
+
+                await message.ack()
+
+    return queue, handle
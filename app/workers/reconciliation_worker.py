@@ -0,0 +1,200 @@
+"""Settle M-PESA donations whose callback never arrived by asking Daraja for the STK push result.
+
+Runs every RECONCILE_INTERVAL_SECONDS:
+
+    python -m app.workers.reconciliation_worker
+    python -m app.workers.reconciliation_worker --once
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import select, update, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.index import AsyncSessionLocal
+from app.features.campaign.counters import apply_donation_deltas, buffer_donation
+from app.features.donation.models import Donation, PaymentMethod, PaymentStatus
+from app.features.donation.status_events import publish_donation_status
+from app.features.payments.models import WebhookEvent, WebhookProvider
+from app.features.payments.mpesa.models import MPESAIntegration
+from app.features.payments.mpesa.credential_cache import credential_cache
+from app.features.payments.mpesa.services import query_stk_status
+from app.features.payments.webhooks import remember_event
+from app.features.stats.rollups import donation_delta
+from app.logger import logger
+
+
+def classify(result: dict):
+    # Daraja answers an errorCode while the push is still in flight, ResultCode once the donor has acted
+    result_code = result.get("ResultCode")
+    if result_code is None:
+        return None
+    return PaymentStatus.SUCCESS if str(result_code) == "0" else PaymentStatus.FAILED
+
+
+async def fetch_stale_page(db: AsyncSession, cutoff: datetime, after: tuple | None) -> list[Donation]:
+    query = (
+        select(Donation)
+        .where(
+            Donation.status == PaymentStatus.PENDING,
+            Donation.method == PaymentMethod.MPESA,
+            Donation.checkout_request_id.isnot(None),
+            Donation.donated_at < cutoff,
+        )
+        .order_by(Donation.donated_at, Donation.id)
+        .limit(settings.RECONCILE_PAGE_SIZE)
+    )
+    if after:
+        query = query.where(tuple_(Donation.donated_at, Donation.id) > after)
+    return list((await db.execute(query)).scalars())
+
+
+async def load_integrations(db: AsyncSession, tenant_ids: set[UUID], integrations: dict) -> None:
+    # Looked up once per tenant per run, shared by every page
+    missing = tenant_ids - integrations.keys()
+    if not missing:
+        return
+    rows = (await db.execute(
+        select(MPESAIntegration).where(MPESAIntegration.tenant_id.in_(missing), MPESAIntegration.is_active.is_(True))
+    )).scalars()
+    for integration in rows:
+        integrations.setdefault(integration.tenant_id, credential_cache.get(integration))
+    for tenant_id in missing:
+        integrations.setdefault(tenant_id, None)
+
+
+async def query_page(donations: list[Donation], integrations: dict, semaphore: asyncio.Semaphore) -> dict:
+    async def query(donation: Donation):
+        integration = integrations.get(donation.tenant_id)
+        if integration is None:
+            return donation, None
+        async with semaphore:
+            try:
+                return donation, await query_stk_status(integration, donation.checkout_request_id)
+            except Exception as e:
+                logger.warning(f"STK status query failed for donation {donation.id}: {e}")
+                return donation, None
+
+    results = await asyncio.gather(*[query(donation) for donation in donations])
+    return {donation.id: result for donation, result in results if result}
+
+
+async def apply_page(db: AsyncSession, donations: list[Donation], results: dict) -> list[Donation]:
+    resolved = {}
+    for donation in donations:
+        status = classify(results.get(donation.id, {}))
+        if status:
+            resolved[donation.checkout_request_id] = (donation, status)
+    if not resolved:
+        return []
+
+    # Claim through the webhook inbox so a callback that turns up late (or raced us) is applied only once
+    claimed = set((await db.execute(
+        insert(WebhookEvent)
+        .values([
+            {"provider": WebhookProvider.MPESA.value, "event_id": checkout_request_id, "event_type": "stk:query"}
+            for checkout_request_id in resolved
+        ])
+        .on_conflict_do_nothing(constraint="uq_webhook_events_provider_event_id")
+        .returning(WebhookEvent.event_id)
+    )).scalars())
+
+    now = datetime.now(timezone.utc)
+    succeeded = [donation for key, (donation, status) in resolved.items()
+                 if key in claimed and status == PaymentStatus.SUCCESS]
+    failed = [donation for key, (donation, status) in resolved.items()
+              if key in claimed and status == PaymentStatus.FAILED]
+
+    for donation in succeeded:
+        donation.donated_at = now
+    # Rollup deltas look for earlier gifts by the same donor, so compute them before the rows flip to SUCCESS
+    candidate_deltas = {donation.id: await donation_delta(db, donation, donation.amount) for donation in succeeded}
+
+    # Rows that left PENDING since they were read are skipped by the UPDATE and must not count towards the totals
+    if succeeded:
+        flipped = set((await db.execute(
+            update(Donation)
+            .where(Donation.id.in_([donation.id for donation in succeeded]), Donation.status == PaymentStatus.PENDING)
+            .values(status=PaymentStatus.SUCCESS, donated_at=now)
+            .returning(Donation.id)
+            .execution_options(synchronize_session=False)
+        )).scalars())
+        succeeded = [donation for donation in succeeded if donation.id in flipped]
+    if failed:
+        flipped = set((await db.execute(
+            update(Donation)
+            .where(Donation.id.in_([donation.id for donation in failed]), Donation.status == PaymentStatus.PENDING)
+            .values(status=PaymentStatus.FAILED)
+            .returning(Donation.id)
+            .execution_options(synchronize_session=False)
+        )).scalars())
+        failed = [donation for donation in failed if donation.id in flipped]
+
+    deltas = await apply_donation_deltas(db, [candidate_deltas[donation.id] for donation in succeeded])
+    await db.commit()
+
+    for delta in deltas:
+        await buffer_donation(delta)
+    for key in claimed:
+        await remember_event(WebhookProvider.MPESA, key)
+
+    settled = succeeded + failed
+    for donation in succeeded:
+        donation.status = PaymentStatus.SUCCESS
+    for donation in failed:
+        donation.status = PaymentStatus.FAILED
+    return settled
+
+
+async def reconcile_stale_donations() -> int:
+    """Walk every stale PENDING M-PESA donation once, returns how many were settled."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.RECONCILE_STALE_AFTER_SECONDS)
+    semaphore = asyncio.Semaphore(settings.RECONCILE_CONCURRENCY)
+    integrations: dict = {}
+    after = None
+    settled_count = 0
+
+    while True:
+        async with AsyncSessionLocal() as db:
+            donations = await fetch_stale_page(db, cutoff, after)
+            if not donations:
+                break
+            after = (donations[-1].donated_at, donations[-1].id)
+
+            await load_integrations(db, {donation.tenant_id for donation in donations}, integrations)
+            # Don't hold a transaction open while waiting on Daraja. Detached rows can be edited below
+            # without the session flushing one UPDATE per donation.
+            await db.commit()
+            db.expunge_all()
+            results = await query_page(donations, integrations, semaphore)
+            settled = await apply_page(db, donations, results)
+
+        for donation in settled:
+            await publish_donation_status(donation)
+        settled_count += len(settled)
+        logger.info(f"Reconciled page of {len(donations)} pending donations, settled {len(settled)}")
+
+    return settled_count
+
+
+async def main(once: bool = False):
+    while True:
+        try:
+            settled = await reconcile_stale_donations()
+            logger.info(f"Reconciliation run finished, settled {settled} donations")
+        except Exception as e:
+            logger.error(f"Reconciliation run failed: {e}")
+        if once:
+            return
+        await asyncio.sleep(settings.RECONCILE_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit, for cron")
+    args = parser.parse_args()
+    asyncio.run(main(once=args.once))
@@ -0,0 +1,63 @@
+"""
+Throughput benchmark for Publisher.publish_many against one-by-one confirmed publishes.
+
+Messages go to the notifications exchange under a benchmark routing key, bound only to a throwaway exclusive queue
+that is deleted at the end, so confirms cover normal routed delivery and no worker sends anything:
+
+    python -m benchmarks.bulk_publish
+    python -m benchmarks.bulk_publish --messages 100000 --window 2000
+"""
+import argparse
+import asyncio
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from aio_pika import ExchangeType
+
+from app.services.rabbitmq.connection import get_connection
+from app.services.rabbitmq.publisher import publisher, Exchanges
+
+ROUTING_KEY = "benchmark.bulk_publish"
+
+
+def payloads(count: int):
+    return ({"email": f"donor{index}@example.com", "campaign": "benchmark", "amount": 25} for index in range(count))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--sequential", type=int, default=1000, help="Messages for the one-by-one baseline")
+    parser.add_argument("--window", type=int, default=1000)
+    args = parser.parse_args()
+
+    connection = await get_connection()
+    channel = await connection.channel()
+    exchange = await channel.declare_exchange(Exchanges.NOTIFICATIONS.value, ExchangeType.TOPIC, durable=True)
+    sink = await channel.declare_queue(exclusive=True, auto_delete=True)
+    await sink.bind(exchange, routing_key=ROUTING_KEY)
+
+    await publisher.start()
+    try:
+        started = time.perf_counter()
+        for body in payloads(args.sequential):
+            await publisher.publish(Exchanges.NOTIFICATIONS.value, ROUTING_KEY, body)
+        elapsed = time.perf_counter() - started
+        print(f"one-by-one : {args.sequential} messages in {elapsed:.2f}s ({args.sequential / elapsed:.0f}/s)")
+
+        stats = await publisher.publish_many(
+            Exchanges.NOTIFICATIONS.value, ROUTING_KEY, payloads(args.messages), window=args.window
+        )
+        print(f"publish_many: {stats.published} messages in {stats.seconds:.2f}s ({stats.per_second:.0f}/s), "
+              f"{stats.failed} failed")
+    finally:
+        await publisher.close()
+        await sink.delete(if_unused=False, if_empty=False)
+        await connection.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
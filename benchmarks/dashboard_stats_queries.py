@@ -0,0 +1,65 @@
+"""
+Regression benchmark for the tenant dashboard: counts the SQL statements and times
+get_tenant_dashboard_stats for one tenant. Exits non-zero if it needs more than MAX_QUERIES.
+
+    python -m benchmarks.dashboard_stats_queries
+    python -m benchmarks.dashboard_stats_queries --tenant-id <uuid> --runs 50
+"""
+import argparse
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import event, text
+
+from app.db.index import engine, SessionLocal
+from app.features.stats.services import get_tenant_dashboard_stats
+
+MAX_QUERIES = 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenant-id")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        tenant_id = args.tenant_id or db.execute(text("""
+            SELECT tenant_id FROM campaign_donations GROUP BY tenant_id ORDER BY count(*) DESC LIMIT 1
+        """)).scalar()
+        if not tenant_id:
+            raise SystemExit("No donations found, pass --tenant-id")
+
+        statements = []
+
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        # Warm the pool and the server-side plan cache before measuring
+        get_tenant_dashboard_stats(db, tenant_id)
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            get_tenant_dashboard_stats(db, tenant_id)
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            get_tenant_dashboard_stats(db, tenant_id)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"tenant: {tenant_id}")
+    print(f"queries per dashboard load: {len(statements)} (max {MAX_QUERIES})")
+    print(f"latency over {args.runs} runs: median={statistics.median(timings):.2f}ms max={max(timings):.2f}ms")
+    if len(statements) > MAX_QUERIES:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
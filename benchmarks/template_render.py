@@ -0,0 +1,73 @@
+"""
+Micro-benchmark of email template rendering: a fresh Environment per render (no caching at all), the cached
+render_template path and a precompiled TemplateShell filled per recipient.
+
+    python -m benchmarks.template_render
+    python -m benchmarks.template_render --renders 50000
+"""
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from app.services.template_renderer import TEMPLATES_DIR, TemplateShell, precompile_templates, render_template
+
+TEMPLATE = "email/donation_receipt.html.j2"
+
+SHARED_CONTEXT = {
+    "brand_name": "Donate Hub",
+    "logo_url": "https://example.com/logo.png",
+    "support_email": "support@fazilabs.com",
+    "campaign_name": "Clean water for Kibera",
+    "campaign_url": "https://donatehub.fazilabs.com/campaigns/clean-water",
+    "currency": "KES",
+}
+
+
+def recipient(index: int) -> dict:
+    return {
+        "donor_name": f"Donor <{index}>",
+        "donor_email": f"donor{index}@example.com",
+        "donation_amount": f"{100 + index:,}",
+        "donation_id": f"D-{index:08d}",
+        "date": "2025-01-01",
+    }
+
+
+def report(label: str, renders: int, elapsed: float) -> None:
+    print(f"{label:<16}: {renders} renders in {elapsed:.2f}s ({renders / elapsed:,.0f}/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=10000)
+    parser.add_argument("--uncached", type=int, default=200, help="Renders for the fresh-Environment baseline")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    for index in range(args.uncached):
+        env = Environment(loader=FileSystemLoader(TEMPLATES_DIR), autoescape=select_autoescape(["html", "xml"]))
+        env.get_template(TEMPLATE).render(**SHARED_CONTEXT, **recipient(index))
+    report("uncached", args.uncached, time.perf_counter() - started)
+
+    precompile_templates()
+    started = time.perf_counter()
+    for index in range(args.renders):
+        render_template(TEMPLATE, {**SHARED_CONTEXT, **recipient(index)})
+    report("render_template", args.renders, time.perf_counter() - started)
+
+    shell = TemplateShell(TEMPLATE, SHARED_CONTEXT, list(recipient(0)))
+    # The shell must produce exactly what a full render does
+    assert shell.render(recipient(7)) == render_template(TEMPLATE, {**SHARED_CONTEXT, **recipient(7)})
+    started = time.perf_counter()
+    for index in range(args.renders):
+        shell.render(recipient(index))
+    report("TemplateShell", args.renders, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, select
+
+from app.db.index import AsyncSessionLocal, async_engine
+from app.features.campaign.counters import write_behind_enabled, flush_pending_totals
+from app.features.campaign.models import Campaign
+from app.features.donation.models import Donation, PaymentMethod, PaymentStatus
+from app.features.payments.models import WebhookEvent
+from app.features.stats.models import CampaignStats, TenantStats, DonationDailyStats
+from app.features.tenant.models import Tenant
+from app.main import app
+
+CALLBACKS = 40
+AMOUNT = Decimal("25.00")
+
+
+def stk_callback(checkout_request_id: str) -> dict:
+    return {"Body": {"stkCallback": {
+        "MerchantRequestID": str(uuid4()),
+        "CheckoutRequestID": checkout_request_id,
+        "ResultCode": 0,
+        "ResultDesc": "The service request is processed successfully.",
+        "CallbackMetadata": {"Item": [
+            {"Name": "Amount", "Value": float(AMOUNT)},
+            {"Name": "MpesaReceiptNumber", "Value": f"R{uuid4().hex[:9].upper()}"},
+            {"Name": "PhoneNumber", "Value": 254700000000},
+        ]},
+    }}}
+
+
+@pytest_asyncio.fixture
+async def pending_donations():
+    try:
+        async with async_engine.connect():
+            pass
+    except Exception as e:
+        pytest.skip(f"Database not reachable: {e}")
+
+    async with AsyncSessionLocal() as db:
+        tenant = Tenant(name=f"Concurrency test {uuid4()}")
+        db.add(tenant)
+        await db.flush()
+        campaign = Campaign(
+            title="Concurrency test",
+            goal_amount=Decimal("100000"),
+            current_amount=Decimal("0"),
+            start_date=datetime.now() - timedelta(days=1),
+            end_date=datetime.now() + timedelta(days=1),
+            tenant_id=tenant.id,
+        )
+        db.add(campaign)
+        await db.flush()
+        checkout_ids = [f"ws_CO_{uuid4().hex}" for _ in range(CALLBACKS)]
+        db.add_all([
+            Donation(
+                tenant_id=tenant.id,
+                campaign_id=campaign.id,
+                amount=AMOUNT,
+                donor_email=f"donor{index}@example.com",
+                method=PaymentMethod.MPESA,
+                status=PaymentStatus.PENDING,
+                checkout_request_id=checkout_id,
+            )
+            for index, checkout_id in enumerate(checkout_ids)
+        ])
+        await db.commit()
+        tenant_id, campaign_id = tenant.id, campaign.id
+
+    yield campaign_id, checkout_ids
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(WebhookEvent).where(WebhookEvent.event_id.in_(checkout_ids)))
+        await db.execute(delete(DonationDailyStats).where(DonationDailyStats.tenant_id == tenant_id))
+        await db.execute(delete(CampaignStats).where(CampaignStats.tenant_id == tenant_id))
+        await db.execute(delete(TenantStats).where(TenantStats.tenant_id == tenant_id))
+        await db.execute(delete(Donation).where(Donation.tenant_id == tenant_id))
+        await db.execute(delete(Campaign).where(Campaign.tenant_id == tenant_id))
+        await db.execute(delete(Tenant).where(Tenant.id == tenant_id))
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_parallel_callbacks_do_not_lose_updates(pending_donations):
+    campaign_id, checkout_ids = pending_donations
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Every callback twice, redeliveries must not count again
+        bodies = [stk_callback(checkout_id) for checkout_id in checkout_ids]
+        responses = await asyncio.gather(*[
+            client.post(f"/api/v2/mpesa/callback/{uuid4()}", json=body) for body in bodies + bodies
+        ])
+    assert all(response.status_code == 200 for response in responses)
+    if write_behind_enabled():
+        await flush_pending_totals()
+
+    async with AsyncSessionLocal() as db:
+        current_amount = (await db.execute(
+            select(Campaign.current_amount).where(Campaign.id == campaign_id)
+        )).scalar_one()
+        stats = (await db.execute(
+            select(CampaignStats.total_amount, CampaignStats.success_count).where(CampaignStats.campaign_id == campaign_id)
+        )).one()
+
+    assert current_amount == AMOUNT * CALLBACKS
+    assert stats.total_amount == AMOUNT * CALLBACKS
+    assert stats.success_count == CALLBACKS
+
+
+@pytest.mark.asyncio
+async def test_callback_for_unsaved_checkout_request_id_is_not_claimed(pending_donations):
+    # The worker hasn't committed this CheckoutRequestID yet, Safaricom must be told to redeliver
+    checkout_id = f"ws_CO_{uuid4().hex}"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(f"/api/v2/mpesa/callback/{uuid4()}", json=stk_callback(checkout_id))
+    assert response.status_code == 404
+
+    async with AsyncSessionLocal() as db:
+        claimed = (await db.execute(
+            select(WebhookEvent.id).where(WebhookEvent.event_id == checkout_id)
+        )).scalar_one_or_none()
+    assert claimed is None
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, text
+
+from app.db.index import SessionLocal
+from app.features.campaign.models import Campaign
+from app.features.campaign.serializers import serialize_campaign
+from app.features.donation.models import Donation, PaymentMethod, PaymentStatus
+from app.features.stats.models import CampaignStats, TenantStats, DonationDailyStats
+from app.features.stats.rollups import rebuild_rollups
+from app.features.tenant.models import Tenant
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        session.execute(text("SELECT 1"))
+    except Exception as e:
+        session.close()
+        pytest.skip(f"Database not reachable: {e}")
+    yield session
+    session.close()
+
+
+def test_total_donors_counts_distinct_successful_donor_emails(db):
+    tenant = Tenant(name=f"Donor count test {uuid4()}")
+    db.add(tenant)
+    db.flush()
+    campaign = Campaign(
+        title="Donor count test",
+        goal_amount=Decimal("1000"),
+        current_amount=Decimal("0"),
+        start_date=datetime.now() - timedelta(days=1),
+        end_date=datetime.now() + timedelta(days=1),
+        tenant_id=tenant.id,
+    )
+    db.add(campaign)
+    db.flush()
+    donations = [
+        ("repeat@example.com", PaymentStatus.SUCCESS),
+        ("repeat@example.com", PaymentStatus.SUCCESS),
+        ("once@example.com", PaymentStatus.SUCCESS),
+        (None, PaymentStatus.SUCCESS),
+        # Unpaid attempts are not donors
+        ("pending@example.com", PaymentStatus.PENDING),
+        ("failed@example.com", PaymentStatus.FAILED),
+    ]
+    db.add_all([
+        Donation(tenant_id=tenant.id, campaign_id=campaign.id, amount=Decimal("10"), donor_email=email,
+                 method=PaymentMethod.MPESA, status=status)
+        for email, status in donations
+    ])
+    db.commit()
+    tenant_id = tenant.id
+
+    try:
+        rebuild_rollups(db, tenant_id)
+        assert serialize_campaign(campaign, db).total_donors == 2
+    finally:
+        db.rollback()
+        db.execute(delete(DonationDailyStats).where(DonationDailyStats.tenant_id == tenant_id))
+        db.execute(delete(CampaignStats).where(CampaignStats.tenant_id == tenant_id))
+        db.execute(delete(TenantStats).where(TenantStats.tenant_id == tenant_id))
+        db.execute(delete(Donation).where(Donation.tenant_id == tenant_id))
+        db.execute(delete(Campaign).where(Campaign.tenant_id == tenant_id))
+        db.execute(delete(Tenant).where(Tenant.id == tenant_id))
+        db.commit()
@@ -0,0 +1,61 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.features.payments.mpesa import token_cache as token_cache_module
+from app.features.payments.mpesa.token_cache import MpesaTokenCache
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(token_cache_module, "get_redis", lambda: None)
+
+
+def counting_fetcher(expires_in=3599):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return f"token-{len(calls)}", expires_in
+
+    return fetch, calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_refresh():
+    cache = MpesaTokenCache(refresh_margin=60)
+    fetch, calls = counting_fetcher()
+    integration_id = uuid4()
+
+    tokens = await asyncio.gather(*[cache.get_token(integration_id, "sandbox", fetch) for _ in range(20)])
+
+    assert set(tokens) == {"token-1"}
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_token_inside_refresh_margin_is_refetched():
+    cache = MpesaTokenCache(refresh_margin=60)
+    fetch, calls = counting_fetcher(expires_in=30)
+    integration_id = uuid4()
+
+    assert await cache.get_token(integration_id, "sandbox", fetch) == "token-1"
+    assert await cache.get_token(integration_id, "sandbox", fetch) == "token-2"
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_scoped_by_environment_and_invalidated():
+    cache = MpesaTokenCache(refresh_margin=60)
+    fetch, calls = counting_fetcher()
+    integration_id = uuid4()
+
+    await cache.get_token(integration_id, "sandbox", fetch)
+    await cache.get_token(integration_id, "production", fetch)
+    await cache.get_token(integration_id, "sandbox", fetch)
+    assert len(calls) == 2
+
+    cache.invalidate(integration_id)
+    await cache.get_token(integration_id, "sandbox", fetch)
+    assert len(calls) == 3
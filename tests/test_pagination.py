@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.common.pagination import encode_cursor, decode_cursor, next_page
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 9, 27, 10, 30, tzinfo=timezone.utc)
+    row_id = uuid4()
+    assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, row_id)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_next_page_only_returns_cursor_when_more_rows_exist():
+    rows = [SimpleNamespace(id=uuid4(), created_at=datetime(2025, 1, day, tzinfo=timezone.utc)) for day in (3, 2, 1)]
+
+    page, cursor = next_page(rows, 3, "created_at")
+    assert page == rows and cursor is None
+
+    page, cursor = next_page(rows, 2, "created_at")
+    assert page == rows[:2]
+    assert decode_cursor(cursor) == (rows[1].created_at, rows[1].id)